@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .sinks import JsonlSink, Sink, SqliteSink
+
+
+def _items(n: int, price: float) -> list[dict]:
+    return [
+        {
+            "key": f"https://books.toscrape.com/catalogue/book-{i}/index.html",
+            "site": "books",
+            "url": f"https://books.toscrape.com/catalogue/book-{i}/index.html",
+            "title": f"Book {i}",
+            "price": price + i % 50,
+            "availability": "In stock",
+            "rating": i % 6,
+            "category": f"Category {i % 50}",
+        }
+        for i in range(n)
+    ]
+
+
+def _time_writes(sink: Sink, items: list[dict], page_size: int) -> float:
+    start = time.perf_counter()
+    with sink:
+        for i in range(0, len(items), page_size):
+            sink.write(items[i : i + page_size])
+    return time.perf_counter() - start
+
+
+def run() -> int:
+    parser = argparse.ArgumentParser(description="Compare JSONL and SQLite sink throughput")
+    parser.add_argument("--items", type=int, default=200_000, help="Items to write per pass.")
+    parser.add_argument("--page-size", type=int, default=20, help="Items per write() call, as in a crawl.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        first = _items(args.items, 10.0)
+        again = _items(args.items, 11.0)
+
+        results = [
+            ("jsonl append", _time_writes(JsonlSink(tmp_path / "items.jsonl"), first, args.page_size)),
+            ("sqlite insert", _time_writes(SqliteSink(tmp_path / "items.db"), first, args.page_size)),
+            ("sqlite upsert (all existing)", _time_writes(SqliteSink(tmp_path / "items.db"), again, args.page_size)),
+        ]
+
+    print(f"{args.items} items, {args.page_size} per write")
+    for name, secs in results:
+        print(f"  {name:<30} {secs:7.2f}s  {args.items / secs:>10,.0f} items/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,437 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Optional
+
+from .fetcher import Fetcher, FetcherConfig
+from .main import crawl
+from .pagination import site_root
+from .robots import RobotsHandler
+from .sinks import open_sink
+
+logger = logging.getLogger(__name__)
+
+_CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# (min, max) for minute, hour, day of month, month, day of week (0 = Sunday).
+_CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def _parse_cron_field(text: str, lo: int, hi: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid cron step: {text!r}")
+
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            start, end = int(a), int(b)
+        else:
+            start = int(part)
+            end = hi if step > 1 else start
+
+        if not (lo <= start <= end <= hi):
+            raise ValueError(f"Cron field {text!r} out of range {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """
+    Five-field cron expression (minute hour day-of-month month day-of-week).
+
+    Supports ``*``, ranges, lists, steps and the ``@hourly``/``@daily``/
+    ``@weekly``/``@monthly`` aliases. Times are local.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        fields = _CRON_ALIASES.get(expr.strip(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expr!r}")
+        parsed = [_parse_cron_field(f, lo, hi) for f, (lo, hi) in zip(fields, _CRON_RANGES)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = parsed
+        self._dom_any = fields[2] == "*"
+        self._dow_any = fields[4] == "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        # Classic cron: when both day fields are restricted, either may match.
+        if self._dom_any or self._dow_any:
+            return dom and dow
+        return dom or dow
+
+    def matches(self, dt: datetime) -> bool:
+        return (
+            dt.minute in self.minutes
+            and dt.hour in self.hours
+            and dt.month in self.months
+            and self._day_matches(dt)
+        )
+
+    def next_after(self, dt: datetime) -> datetime:
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months or not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression never fires: {self.expr!r}")
+
+
+@dataclass
+class JobSpec:
+    name: str
+    start: str = "https://books.toscrape.com/"
+    max_pages: int = 5
+    schedule: Optional[str] = None
+    dry_run: bool = False
+    sink: str = "jsonl"
+    out: Optional[str] = None
+
+
+@dataclass
+class JobState:
+    spec: JobSpec
+    cron: Optional[CronSchedule] = None
+    next_run: Optional[datetime] = None
+    running: bool = False
+    runs: int = 0
+    last_started: Optional[float] = None
+    last_duration_s: Optional[float] = None
+    last_pages: Optional[int] = None
+    last_error: Optional[str] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class CrawlDaemon:
+    """
+    Runs crawl jobs on cron schedules or on demand inside one process.
+
+    Fetchers (and their connection pools) and robots.txt handlers are kept
+    per site and reused across runs. At most ``max_jobs`` crawls run at once,
+    jobs for the same site run one after another so the site's delay holds,
+    and a job that is still running is not started a second time. A job whose
+    site is busy waits in that site's queue, not in the executor, so it does
+    not hold a slot that a job for another site could use.
+    """
+
+    def __init__(
+        self,
+        jobs: list[JobSpec],
+        *,
+        max_jobs: int = 2,
+        user_agent: str = "book-scraper/0.1 (+yourname)",
+        delay_ms: int = 800,
+        robots_ttl_s: float = 3600.0,
+        data_dir: Optional[Path] = None,
+        fetcher_factory: Optional[Callable[[FetcherConfig], Fetcher]] = None,
+        robots_factory: Optional[Callable[[str], RobotsHandler]] = None,
+    ):
+        self.jobs = {
+            j.name: JobState(spec=j, cron=CronSchedule(j.schedule) if j.schedule else None)
+            for j in jobs
+        }
+        self.user_agent = user_agent
+        self.delay_ms = delay_ms
+        self.robots_ttl_s = robots_ttl_s
+        self.data_dir = data_dir or Path(__file__).resolve().parent / "data"
+        self._fetcher_factory = fetcher_factory or Fetcher
+        self._robots_factory = robots_factory or (
+            lambda base: RobotsHandler(base_url=base, user_agent=self.user_agent)
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="crawl")
+        self._fetchers: dict[str, Fetcher] = {}
+        self._robots: dict[str, tuple[RobotsHandler, float]] = {}
+        # Site root -> jobs waiting for it; a site has an entry while one of
+        # its jobs is running.
+        self._site_jobs: dict[str, deque[JobState]] = {}
+        self._cache_lock = threading.Lock()
+        self._sites_idle = threading.Condition(self._cache_lock)
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def _robots_for(self, base_url: str) -> RobotsHandler:
+        with self._cache_lock:
+            cached = self._robots.get(base_url)
+            if cached and time.monotonic() - cached[1] < self.robots_ttl_s:
+                return cached[0]
+        robots = self._robots_factory(base_url)
+        with self._cache_lock:
+            self._robots[base_url] = (robots, time.monotonic())
+        return robots
+
+    def _site(self, base_url: str) -> tuple[Fetcher, RobotsHandler]:
+        """Warm fetcher and robots for a site; only the site's running job calls this."""
+        robots = self._robots_for(base_url)
+        delay_ms = max(self.delay_ms, robots.get_crawl_delay_ms())
+        with self._cache_lock:
+            fetcher = self._fetchers.get(base_url)
+            if fetcher is None:
+                fetcher = self._fetchers[base_url] = self._fetcher_factory(
+                    FetcherConfig(user_agent=self.user_agent, base_delay_ms=delay_ms)
+                )
+            else:
+                fetcher.config.base_delay_ms = delay_ms
+        return fetcher, robots
+
+    def trigger(self, name: str) -> bool:
+        """Submits a job to run now. False if it is unknown or already running."""
+        state = self.jobs.get(name)
+        if state is None:
+            return False
+        with state.lock:
+            if state.running:
+                logger.info("[daemon] Job %s already running; skipping trigger", name)
+                return False
+            state.running = True
+        base_url = site_root(state.spec.start)
+        with self._cache_lock:
+            waiting = self._site_jobs.get(base_url)
+            if waiting is not None:
+                logger.info("[daemon] Job %s queued behind another job for %s", name, base_url)
+                waiting.append(state)
+                return True
+            self._site_jobs[base_url] = deque()
+        self._executor.submit(self._run_job, state, base_url)
+        return True
+
+    def _release_site(self, base_url: str) -> None:
+        """Hands the site to its next queued job, or marks it idle."""
+        with self._cache_lock:
+            waiting = self._site_jobs[base_url]
+            if not waiting:
+                del self._site_jobs[base_url]
+                self._sites_idle.notify_all()
+                return
+            state = waiting.popleft()
+        self._executor.submit(self._run_job, state, base_url)
+
+    def _run_job(self, state: JobState, base_url: str) -> None:
+        spec = state.spec
+        started = time.monotonic()
+        state.last_started = time.time()
+        try:
+            fetcher, robots = self._site(base_url)
+            default_name = "items.db" if spec.sink == "sqlite" else "items.jsonl"
+            data_path = Path(spec.out) if spec.out else self.data_dir / default_name
+            with nullcontext() if spec.dry_run else open_sink(spec.sink, data_path) as sink:
+                logger.info("[daemon] Starting job %s", spec.name)
+                result = crawl(
+                    spec.start,
+                    fetcher=fetcher,
+                    robots=robots,
+                    max_pages=spec.max_pages,
+                    sink=sink,
+                    dry_run=spec.dry_run,
+                )
+            state.last_pages = result.pages
+            state.last_error = None
+            logger.info(
+                "[daemon] Job %s done: pages=%d, items=%d in %.2fs",
+                spec.name,
+                result.pages,
+                result.items_written,
+                time.monotonic() - started,
+            )
+        except Exception as e:
+            state.last_error = f"{type(e).__name__}: {e}"
+            logger.exception("[daemon] Job %s failed: %s", spec.name, e)
+        finally:
+            state.last_duration_s = time.monotonic() - started
+            with state.lock:
+                state.running = False
+                state.runs += 1
+            self._release_site(base_url)
+
+    def status(self) -> dict[str, dict]:
+        return {
+            name: {
+                "schedule": s.spec.schedule,
+                "next_run": s.next_run.isoformat() if s.next_run else None,
+                "running": s.running,
+                "runs": s.runs,
+                "last_started": s.last_started,
+                "last_duration_s": s.last_duration_s,
+                "last_pages": s.last_pages,
+                "last_error": s.last_error,
+            }
+            for name, s in self.jobs.items()
+        }
+
+    def run_forever(self) -> None:
+        now = datetime.now()
+        for state in self.jobs.values():
+            if state.cron:
+                state.next_run = state.cron.next_after(now)
+
+        while not self._stop.is_set():
+            now = datetime.now()
+            for name, state in self.jobs.items():
+                if state.next_run and state.next_run <= now:
+                    self.trigger(name)
+                    state.next_run = state.cron.next_after(now)
+
+            upcoming = [s.next_run for s in self.jobs.values() if s.next_run]
+            wait_s = 60.0
+            if upcoming:
+                wait_s = max(0.0, min((min(upcoming) - datetime.now()).total_seconds(), wait_s))
+            self._wake.wait(wait_s)
+            self._wake.clear()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def close(self) -> None:
+        # Queued jobs are submitted by the job ahead of them, so wait for
+        # every site to drain before the executor stops accepting work.
+        with self._sites_idle:
+            self._sites_idle.wait_for(lambda: not self._site_jobs)
+        self._executor.shutdown(wait=True)
+        for fetcher in self._fetchers.values():
+            fetcher.close()
+
+
+def _make_handler(daemon: CrawlDaemon):
+    class TriggerHandler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body: dict) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/jobs":
+                self._send(200, daemon.status())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            parts = self.path.strip("/").split("/")
+            if len(parts) != 3 or parts[0] != "jobs" or parts[2] != "run":
+                self._send(404, {"error": "not found"})
+            elif parts[1] not in daemon.jobs:
+                self._send(404, {"error": f"unknown job {parts[1]!r}"})
+            elif daemon.trigger(parts[1]):
+                self._send(202, {"job": parts[1], "status": "started"})
+            else:
+                self._send(409, {"job": parts[1], "status": "already running"})
+
+        def log_message(self, format, *args):
+            logger.debug("[daemon] http: " + format, *args)
+
+    return TriggerHandler
+
+
+def load_jobs(path: Path) -> tuple[list[JobSpec], dict]:
+    """Reads a JSON config with a ``jobs`` list plus optional daemon settings."""
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    jobs = [JobSpec(**j) for j in raw.pop("jobs", [])]
+    return jobs, raw
+
+
+def run() -> int:
+    parser = argparse.ArgumentParser(
+        description="Long-running crawl daemon with cron schedules and a local trigger endpoint"
+    )
+    parser.add_argument(
+        "--config",
+        type=str,
+        required=True,
+        help="JSON file with a 'jobs' list (name, start, max_pages, schedule, dry_run, sink, out).",
+    )
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=None,
+        help="Maximum crawls running at once (default 2).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="Port for the trigger endpoint on 127.0.0.1 (default 8765, 0 disables).",
+    )
+    parser.add_argument(
+        "--delay-ms",
+        type=int,
+        default=None,
+        help="Polite base delay between requests in milliseconds (default 800).",
+    )
+    parser.add_argument(
+        "--user-agent",
+        type=str,
+        default=None,
+        help="Custom User-Agent string.",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    log = logging.getLogger("scraper.daemon")
+
+    jobs, settings = load_jobs(Path(args.config))
+    port = args.port if args.port is not None else settings.get("port", 8765)
+    daemon = CrawlDaemon(
+        jobs,
+        max_jobs=args.max_jobs or settings.get("max_jobs", 2),
+        user_agent=args.user_agent or settings.get("user_agent", "book-scraper/0.1 (+yourname)"),
+        delay_ms=args.delay_ms if args.delay_ms is not None else settings.get("delay_ms", 800),
+    )
+
+    server = None
+    if port:
+        server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(daemon))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        log.info("Trigger endpoint on http://127.0.0.1:%d (POST /jobs/<name>/run)", port)
+
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    log.info("Daemon started with %d jobs: %s", len(jobs), ", ".join(daemon.jobs))
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        log.warning("Interrupted by user. Waiting for running jobs.")
+    finally:
+        if server:
+            server.shutdown()
+        daemon.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
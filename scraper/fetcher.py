@@ -2,6 +2,7 @@ import logging
 import random
 import time
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Optional
 
 import httpx
@@ -35,12 +36,17 @@ class Fetcher:
     Synchronous HTTP fetcher with shared client, polite delay, and retries.
     """
 
-    def __init__(self, config: Optional[FetcherConfig] = None):
+    def __init__(
+        self,
+        config: Optional[FetcherConfig] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+    ):
         self.config = config or FetcherConfig()
         self.client = httpx.Client(
             timeout=self.config.timeout_s,
             headers={"User-Agent": self.config.user_agent},
             follow_redirects=True,
+            transport=transport,
         )
 
     def __enter__(self):
@@ -97,3 +103,24 @@ class Fetcher:
         if delay_s > 0:
             logger.debug("[fetch] Sleeping %.3fs before attempt %d", delay_s, attempt_no)
             time.sleep(delay_s)
+
+
+def fixture_transport(root: Path) -> httpx.MockTransport:
+    """
+    Serves requests from files under ``root`` instead of the network.
+
+    The URL path maps to a file path (directories map to ``index.html``) and
+    the host is ignored, so fixtures saved from a site replay offline.
+    """
+    root = Path(root).resolve()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        rel = request.url.path.lstrip("/")
+        if not rel or rel.endswith("/"):
+            rel += "index.html"
+        path = (root / rel).resolve()
+        if root not in path.parents or not path.is_file():
+            return httpx.Response(404, request=request)
+        return httpx.Response(200, content=path.read_bytes(), request=request)
+
+    return httpx.MockTransport(handler)
@@ -1,34 +1,236 @@
 from __future__ import annotations
 
 import argparse
-import json
 import logging
 import sys
+from contextlib import nullcontext
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
-from urllib.parse import urlsplit, urlunsplit
+from typing import Iterable, Optional
 
-from .fetcher import Fetcher, FetcherConfig
+from .fetcher import Fetcher, FetcherConfig, fixture_transport
+from .pagination import site_root
 from .parser import parse_books_list
+from .planner import PageHistory, PlannerConfig, content_hash, plan
+from .profiling import CrawlProfiler, no_stage
 from .robots import RobotsHandler
+from .sinks import SINKS, Sink, open_sink
 from .types import BookItem
 
+LIVE_HISTORY_PATH = Path(__file__).resolve().parent / "data" / "history.db"
 
-def _root_of(url: str) -> str:
-    parts = urlsplit(url)
-    return urlunsplit((parts.scheme, parts.netloc, "/", "", ""))
 
+def _history_path(args: argparse.Namespace) -> Optional[Path]:
+    """
+    Where this run keeps its fetch history, or None for no history.
 
-def _write_jsonl(path: Path, items: Iterable[dict]) -> int:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    n = 0
-    with path.open("a", encoding="utf-8") as f:
-        for it in items:
-            f.write(json.dumps(it, ensure_ascii=False) + "\n")
-            n += 1
+    Offline runs replay saved pages, so recording them in the live history
+    would make the planner treat the real site as freshly fetched. They keep
+    a history next to ``--out`` (or in the ``--profile`` directory) instead.
+    """
+    if args.no_history:
+        return None
+    if args.history:
+        return Path(args.history)
+    if args.offline:
+        if args.out:
+            out = Path(args.out)
+            return out.with_name(out.name + ".history.db")
+        if args.profile:
+            return Path(args.profile) / "history.db"
+        return None
+    return LIVE_HISTORY_PATH
+
+
+@dataclass
+class CrawlResult:
+    pages: int
+    items_written: int
+    unique_items: int
+    unchanged_pages: int = 0
+
+
+def _emit(
+    items: list[BookItem],
+    seen_item_keys: set[str],
+    sink: Optional[Sink],
+    dry_run: bool,
+    page_url: str,
+    next_url: Optional[str],
+) -> int:
+    log = logging.getLogger("scraper.main")
+    new_items: list[BookItem] = []
+    for it in items:
+        k = it["key"]
+        if k in seen_item_keys:
+            continue
+        seen_item_keys.add(k)
+        new_items.append(it)
+
+    if dry_run or sink is None:
+        log.info(
+            "[dry-run] Page %s → parsed=%d, new=%d, next=%s",
+            page_url,
+            len(items),
+            len(new_items),
+            next_url,
+        )
+        return 0
+
+    n = sink.write(new_items)
+    log.info("Wrote %d new items from %s", n, page_url)
     return n
 
 
+def _record_page(history: PageHistory, sink: Optional[Sink], url: str, digest: str) -> None:
+    """Records a fetch once its items are durable, so a failed write is retried next run."""
+    if sink is not None:
+        sink.flush()
+    history.record(url, digest)
+
+
+def crawl(
+    start_url: str,
+    *,
+    fetcher: Fetcher,
+    robots: RobotsHandler,
+    max_pages: int,
+    sink: Optional[Sink],
+    dry_run: bool = False,
+    history: Optional[PageHistory] = None,
+    profiler: Optional[CrawlProfiler] = None,
+) -> CrawlResult:
+    """
+    Follows next-page links from ``start_url`` and writes new items to ``sink``.
+
+    The fetcher and robots handler are supplied by the caller so long-lived
+    processes can reuse them across crawls. ``sink`` may be None for dry runs.
+    Fetches are recorded in ``history`` when given, and fetch, parse and
+    write stages are profiled when ``profiler`` is given.
+    """
+    log = logging.getLogger("scraper.main")
+    stage = profiler.stage if profiler else no_stage
+    base_url = site_root(start_url)
+    visited_pages: set[str] = set()
+    seen_item_keys: set[str] = set()
+    current_url: str | None = start_url
+    pages_crawled = 0
+    items_written_total = 0
+
+    while current_url and pages_crawled < max_pages:
+        if current_url in visited_pages:
+            log.warning(
+                "Already visited page %s. Stopping to avoid loop.", current_url
+            )
+            break
+        visited_pages.add(current_url)
+
+        assert current_url.startswith(("http://", "https://")), current_url
+
+        if not robots.can_fetch(current_url):
+            log.warning("Robots disallows page %s. Stopping.", current_url)
+            break
+
+        with stage("fetch"):
+            html = fetcher.get_text(current_url)
+        with stage("parse"):
+            items, next_url = parse_books_list(
+                html, base_url=base_url, page_url=current_url
+            )
+
+        with stage("write"):
+            items_written_total += _emit(
+                items, seen_item_keys, sink, dry_run, current_url, next_url
+            )
+            if history is not None and not dry_run:
+                _record_page(history, sink, current_url, content_hash(items, next_url))
+        if profiler:
+            profiler.page_done(current_url)
+
+        pages_crawled += 1
+
+        if not next_url:
+            log.info("No next page found. Stopping.")
+            break
+
+        current_url = next_url
+
+    return CrawlResult(
+        pages=pages_crawled,
+        items_written=items_written_total,
+        unique_items=len(seen_item_keys),
+    )
+
+
+def crawl_planned(
+    start_url: str,
+    *,
+    fetcher: Fetcher,
+    robots: RobotsHandler,
+    history: PageHistory,
+    config: PlannerConfig,
+    sink: Optional[Sink],
+    dry_run: bool = False,
+    profiler: Optional[CrawlProfiler] = None,
+) -> CrawlResult:
+    """
+    Fetches the pages chosen by the recrawl planner, within ``config.budget``.
+
+    Items are written only from pages whose content changed since the last
+    fetch; items from unchanged pages go to ``sink.refresh``. Next-page links
+    not yet in the history are fetched too while budget remains, so new
+    pages are discovered.
+    """
+    log = logging.getLogger("scraper.main")
+    stage = profiler.stage if profiler else no_stage
+    frontier = [p.url for p in plan(history, [start_url], config)]
+    queued = set(frontier)
+    seen_item_keys: set[str] = set()
+    pages_crawled = 0
+    unchanged = 0
+    items_written_total = 0
+
+    while frontier and pages_crawled < config.budget:
+        url = frontier.pop(0)
+        if not robots.can_fetch(url):
+            log.warning("Robots disallows page %s. Skipping.", url)
+            continue
+
+        with stage("fetch"):
+            html = fetcher.get_text(url)
+        with stage("parse"):
+            items, next_url = parse_books_list(html, base_url=site_root(url), page_url=url)
+        pages_crawled += 1
+
+        if next_url and next_url not in queued and next_url not in history:
+            queued.add(next_url)
+            frontier.append(next_url)
+
+        digest = content_hash(items, next_url)
+        prev = history.get(url)
+        if prev is not None and prev.content_hash == digest and not dry_run:
+            unchanged += 1
+            log.info("Page %s unchanged since last fetch", url)
+            with stage("write"):
+                if sink is not None:
+                    sink.refresh(items)
+                _record_page(history, sink, url, digest)
+        else:
+            with stage("write"):
+                items_written_total += _emit(items, seen_item_keys, sink, dry_run, url, next_url)
+                if not dry_run:
+                    _record_page(history, sink, url, digest)
+        if profiler:
+            profiler.page_done(url)
+
+    return CrawlResult(
+        pages=pages_crawled,
+        items_written=items_written_total,
+        unique_items=len(seen_item_keys),
+        unchanged_pages=unchanged,
+    )
+
+
 def run() -> int:
     parser = argparse.ArgumentParser(
         description="BooksToScrape crawler - data/items.jsonl"
@@ -49,7 +251,7 @@ def run() -> int:
         "--max-pages",
         type=int,
         default=5,
-        help="Maximum listing pages to crawl.",
+        help="Maximum listing pages to crawl (the request budget with --plan).",
     )
     parser.add_argument(
         "--delay-ms",
@@ -68,7 +270,68 @@ def run() -> int:
         action="store_true",
         help="Log what would be crawled without writing items.jsonl.",
     )
+    parser.add_argument(
+        "--sink",
+        choices=SINKS,
+        default="jsonl",
+        help="Output backend: append to data/items.jsonl, or upsert into data/items.db.",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        default=None,
+        help="Output path (default: data/items.jsonl or data/items.db).",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Let the recrawl planner pick pages from the fetch history instead of walking from --start.",
+    )
+    parser.add_argument(
+        "--history",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Per-page fetch history used by --plan (default data/history.db; "
+        "with --offline, next to --out or in the --profile directory).",
+    )
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Do not record fetches in the history (cannot be combined with --plan).",
+    )
+    parser.add_argument(
+        "--freshness-sla-h",
+        type=float,
+        default=24.0,
+        help="With --plan, pages not fetched for this many hours are revisited first.",
+    )
+    parser.add_argument(
+        "--sample-prob",
+        type=float,
+        default=0.05,
+        help="With --plan, chance of revisiting a page that is unlikely to have changed.",
+    )
+    parser.add_argument(
+        "--offline",
+        type=str,
+        default=None,
+        metavar="DIR",
+        help="Serve pages and robots.txt from saved files under DIR instead of the network.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        nargs="?",
+        const=str(Path(__file__).resolve().parent / "data" / "profile"),
+        default=None,
+        metavar="DIR",
+        help="Profile fetch/parse/write stages and write a report to DIR (default data/profile).",
+    )
     args = parser.parse_args()
+    history_path = _history_path(args)
+    if args.plan and history_path is None:
+        parser.error("--plan needs a fetch history; pass --history (or --out with --offline)")
 
     logging.basicConfig(
         level=logging.INFO,
@@ -77,7 +340,7 @@ def run() -> int:
     log = logging.getLogger("scraper.main")
 
     start_url = args.start
-    base_url = _root_of(start_url)
+    base_url = site_root(start_url)
 
     if args.site != "books":
         log.warning(
@@ -85,7 +348,17 @@ def run() -> int:
             args.site,
         )
 
-    robots = RobotsHandler(base_url=base_url, user_agent=args.user_agent)
+    transport = None
+    robots_txt = None
+    if args.offline:
+        transport = fixture_transport(Path(args.offline))
+        robots_file = Path(args.offline) / "robots.txt"
+        robots_txt = robots_file.read_text(encoding="utf-8") if robots_file.exists() else ""
+        log.info("Offline mode: serving pages from %s", args.offline)
+
+    robots = RobotsHandler(
+        base_url=base_url, user_agent=args.user_agent, robots_txt=robots_txt
+    )
     robots_delay_ms = robots.get_crawl_delay_ms()
     effective_delay_ms = max(args.delay_ms, robots_delay_ms)
     log.info(
@@ -100,72 +373,51 @@ def run() -> int:
         base_delay_ms=effective_delay_ms,
     )
 
-    data_path = Path(__file__).resolve().parent / "data" / "items.jsonl"
-    visited_pages: set[str] = set()
-    seen_item_keys: set[str] = set()
-    current_url = start_url
-    pages_crawled = 0
-    items_written_total = 0
+    default_name = "items.db" if args.sink == "sqlite" else "items.jsonl"
+    data_path = Path(args.out) if args.out else Path(__file__).resolve().parent / "data" / default_name
+    # Dry runs never record fetches, so the history is only read by --plan.
+    use_history = history_path is not None and (args.plan or not args.dry_run)
+    profiler = CrawlProfiler(Path(args.profile)) if args.profile else None
 
     try:
-        with Fetcher(cfg) as fetcher:
-            while current_url and pages_crawled < args.max_pages:
-                if current_url in visited_pages:
-                    log.warning(
-                        "Already visited page %s. Stopping to avoid loop.", current_url
-                    )
-                    break
-                visited_pages.add(current_url)
-
-                assert current_url.startswith(("http://", "https://")), current_url
-
-                if not robots.can_fetch(current_url):
-                    log.warning("Robots disallows page %s. Stopping.", current_url)
-                    break
-
-                html = fetcher.get_text(current_url)
-                items, next_url = parse_books_list(
-                    html, base_url=base_url, page_url=current_url
+        if profiler:
+            profiler.start()
+        with Fetcher(cfg, transport=transport) as fetcher, (
+            PageHistory(history_path) if use_history else nullcontext()
+        ) as history, (nullcontext() if args.dry_run else open_sink(args.sink, data_path)) as sink:
+            if args.plan:
+                planner_cfg = PlannerConfig(
+                    freshness_sla_s=args.freshness_sla_h * 3600.0,
+                    budget=args.max_pages,
+                    min_sample_prob=args.sample_prob,
+                )
+                result = crawl_planned(
+                    start_url,
+                    fetcher=fetcher,
+                    robots=robots,
+                    history=history,
+                    config=planner_cfg,
+                    sink=sink,
+                    dry_run=args.dry_run,
+                    profiler=profiler,
+                )
+            else:
+                result = crawl(
+                    start_url,
+                    fetcher=fetcher,
+                    robots=robots,
+                    max_pages=args.max_pages,
+                    sink=sink,
+                    dry_run=args.dry_run,
+                    history=history,
+                    profiler=profiler,
                 )
-
-                new_items: list[BookItem] = []
-                for it in items:
-                    k = it["key"]
-                    if k in seen_item_keys:
-                        continue
-                    seen_item_keys.add(k)
-                    new_items.append(it)
-
-                if args.dry_run:
-                    log.info(
-                        "[dry-run] Page %s → parsed=%d, new=%d, next=%s",
-                        current_url,
-                        len(items),
-                        len(new_items),
-                        next_url,
-                    )
-                else:
-                    n = _write_jsonl(data_path, new_items)
-                    items_written_total += n
-                    log.info(
-                        "Wrote %d new items (total %d) from %s",
-                        n,
-                        items_written_total,
-                        current_url,
-                    )
-
-                pages_crawled += 1
-
-                if not next_url:
-                    log.info("No next page found. Stopping.")
-                    break
-
-                current_url = next_url
 
         log.info(
-            "Crawl complete: pages=%d, unique_items=%d, dry_run=%s, output=%s",
-            pages_crawled,
-            len(seen_item_keys),
+            "Crawl complete: pages=%d, unchanged=%d, unique_items=%d, dry_run=%s, output=%s",
+            result.pages,
+            result.unchanged_pages,
+            result.unique_items,
             args.dry_run,
             data_path if not args.dry_run else "(none)",
         )
@@ -176,6 +428,11 @@ def run() -> int:
     except Exception as e:
         log.exception("Fatal error: %s", e)
         return 1
+    finally:
+        # A failed or interrupted crawl is often the one worth profiling.
+        if profiler:
+            profiler.stop()
+            log.info("Profile report: %s", profiler.write_report())
 
 
 if __name__ == "__main__":
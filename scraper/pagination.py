@@ -1,5 +1,5 @@
 from typing import Optional
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit, urlunsplit
 
 
 def resolve_next(base_url: str, next_href: Optional[str]) -> Optional[str]:
@@ -7,3 +7,7 @@ def resolve_next(base_url: str, next_href: Optional[str]) -> Optional[str]:
         return None
     return urljoin(base_url, next_href)
 
+
+def site_root(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, "/", "", ""))
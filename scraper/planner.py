@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import random
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(items: Iterable[dict], next_url: Optional[str]) -> str:
+    """Hashes parsed page content, so markup-only changes do not count."""
+    h = hashlib.sha1()
+    for it in items:
+        h.update(json.dumps(it, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    h.update((next_url or "").encode("utf-8"))
+    return h.hexdigest()
+
+
+@dataclass
+class PageRecord:
+    url: str
+    last_fetched: float
+    content_hash: str
+    fetches: int
+    changes: int
+    interval_total_s: float
+
+    def change_rate(self, prior_interval_s: float) -> float:
+        """
+        Estimated changes per second.
+
+        Uses the bias-reduced estimator for periodic polling,
+        ``-ln((n - X + 0.5) / (n + 0.5)) / mean_interval``, where ``n`` is
+        the number of fetch intervals and ``X`` how many showed a change.
+        Falls back to ``1 / prior_interval_s`` until two fetches exist.
+        """
+        n = self.fetches - 1
+        if n < 1 or self.interval_total_s <= 0:
+            return 1.0 / prior_interval_s
+        ratio = (n - self.changes + 0.5) / (n + 0.5)
+        return -math.log(ratio) / (self.interval_total_s / n)
+
+
+class PageHistory:
+    """Per-URL fetch history: last fetch time, content hash, and change counts."""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pages (
+        url TEXT PRIMARY KEY,
+        last_fetched REAL NOT NULL,
+        content_hash TEXT NOT NULL,
+        fetches INTEGER NOT NULL,
+        changes INTEGER NOT NULL,
+        interval_total_s REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(self._SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get(self, url: str) -> Optional[PageRecord]:
+        row = self.conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        return PageRecord(*row) if row else None
+
+    def __contains__(self, url: str) -> bool:
+        return self.get(url) is not None
+
+    def all(self) -> list[PageRecord]:
+        return [PageRecord(*row) for row in self.conn.execute("SELECT * FROM pages")]
+
+    def record(self, url: str, digest: str, now: Optional[float] = None) -> bool:
+        """Records a fetch. Returns True if the content differs from last time."""
+        now = time.time() if now is None else now
+        prev = self.get(url)
+        if prev is None:
+            self.conn.execute(
+                "INSERT INTO pages VALUES (?, ?, ?, 1, 0, 0)",
+                (url, now, digest),
+            )
+            self.conn.commit()
+            return True
+
+        changed = digest != prev.content_hash
+        self.conn.execute(
+            """
+            UPDATE pages SET last_fetched = ?, content_hash = ?, fetches = fetches + 1,
+                changes = changes + ?, interval_total_s = interval_total_s + ?
+            WHERE url = ?
+            """,
+            (now, digest, int(changed), max(0.0, now - prev.last_fetched), url),
+        )
+        self.conn.commit()
+        return changed
+
+
+@dataclass
+class PlannerConfig:
+    freshness_sla_s: float = 24 * 3600.0
+    budget: int = 50
+    min_sample_prob: float = 0.05
+    prior_change_interval_s: float = 24 * 3600.0
+    seed: Optional[int] = None
+
+
+@dataclass
+class PlannedPage:
+    url: str
+    reason: str  # "new", "overdue", "likely-changed" or "sampled"
+    score: float
+
+
+_REASON_ORDER = {"new": 0, "overdue": 1, "likely-changed": 2, "sampled": 3}
+
+
+def plan(
+    history: PageHistory,
+    seeds: Iterable[str],
+    config: Optional[PlannerConfig] = None,
+    now: Optional[float] = None,
+) -> list[PlannedPage]:
+    """
+    Orders and prunes the frontier for one run.
+
+    Unfetched seeds come first, then pages older than the freshness SLA
+    (most overdue first), then the rest by estimated probability of having
+    changed since the last fetch. Pages below ``min_sample_prob`` are kept
+    only with that probability, so rarely changing pages are still checked
+    now and then. The result is cut to ``budget`` requests.
+    """
+    config = config or PlannerConfig()
+    now = time.time() if now is None else now
+    rng = random.Random(config.seed)
+
+    planned: list[PlannedPage] = []
+    known: set[str] = set()
+    skipped = 0
+    for rec in history.all():
+        known.add(rec.url)
+        age = max(0.0, now - rec.last_fetched)
+        if age >= config.freshness_sla_s:
+            planned.append(PlannedPage(rec.url, "overdue", age / max(config.freshness_sla_s, 1.0)))
+            continue
+        p_changed = 1.0 - math.exp(-rec.change_rate(config.prior_change_interval_s) * age)
+        if p_changed >= config.min_sample_prob:
+            planned.append(PlannedPage(rec.url, "likely-changed", p_changed))
+        elif rng.random() < config.min_sample_prob:
+            planned.append(PlannedPage(rec.url, "sampled", p_changed))
+        else:
+            skipped += 1
+
+    for url in seeds:
+        if url not in known:
+            known.add(url)
+            planned.append(PlannedPage(url, "new", math.inf))
+
+    planned.sort(key=lambda p: (_REASON_ORDER[p.reason], -p.score))
+    overdue = sum(1 for p in planned if p.reason == "overdue")
+    if overdue > config.budget:
+        logger.warning(
+            "[planner] %d pages exceed the freshness SLA but the budget is %d", overdue, config.budget
+        )
+    logger.info(
+        "[planner] Planned %d of %d candidates (budget %d, %d skipped as unlikely to change)",
+        min(len(planned), config.budget),
+        len(planned) + skipped,
+        config.budget,
+        skipped,
+    )
+    return planned[: config.budget]
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    wall_s: float = 0.0
+    peak_bytes: int = 0
+    profile: cProfile.Profile = field(default_factory=cProfile.Profile)
+
+
+class CrawlProfiler:
+    """
+    Collects per-stage CPU and memory profiles for one crawl.
+
+    Each ``stage()`` block feeds that stage's cProfile and records the
+    tracemalloc peak reached inside it. ``page_done()`` snapshots allocations
+    after each page. A sampling thread records the main thread's stack every
+    ``sample_interval_s`` for a collapsed-stack (flamegraph) file. All three
+    add overhead, so compare timings between profiled runs only.
+    """
+
+    # Allocations made by the profiler itself, hidden from every report.
+    _own_files = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, cProfile.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+
+    def __init__(self, out_dir: Path, sample_interval_s: float = 0.005, top_n: int = 15):
+        self.out_dir = Path(out_dir)
+        self.sample_interval_s = sample_interval_s
+        self.top_n = top_n
+        self.stages: dict[str, StageStats] = {}
+        self.page_allocs: list[tuple[str, list[tracemalloc.StatisticDiff]]] = []
+        self.samples: Counter[str] = Counter()
+        self._current = "other"
+        self._prev_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._first_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._main_ident = threading.get_ident()
+
+    def start(self) -> None:
+        tracemalloc.start(1)
+        self._first_snapshot = self._prev_snapshot = tracemalloc.take_snapshot().filter_traces(self._own_files)
+        self._main_ident = threading.get_ident()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        st = self.stages.setdefault(name, StageStats())
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self._current = name
+        started = time.perf_counter()
+        st.profile.enable()
+        try:
+            yield
+        finally:
+            st.profile.disable()
+            st.wall_s += time.perf_counter() - started
+            st.calls += 1
+            self._current = "other"
+            _, peak = tracemalloc.get_traced_memory()
+            st.peak_bytes = max(st.peak_bytes, peak - base)
+
+    def page_done(self, url: str) -> None:
+        self._current = "profiler"
+        snap = tracemalloc.take_snapshot().filter_traces(self._own_files)
+        if self._prev_snapshot is not None:
+            diffs = snap.compare_to(self._prev_snapshot, "lineno")[:5]
+            self.page_allocs.append((url, diffs))
+        self._prev_snapshot = snap
+        self._current = "other"
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.sample_interval_s):
+            frame = sys._current_frames().get(self._main_ident)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            names.append(self._current)
+            self.samples[";".join(reversed(names))] += 1
+
+    def write_report(self) -> Path:
+        """Writes the text report, per-stage .pstats files and stacks.collapsed."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        out = io.StringIO()
+        w = out.write
+
+        w("== Stages ==\n")
+        w(f"{'stage':<10} {'calls':>6} {'wall s':>9} {'peak KiB':>10}\n")
+        for name, st in self.stages.items():
+            w(f"{name:<10} {st.calls:>6} {st.wall_s:>9.3f} {st.peak_bytes / 1024:>10.1f}\n")
+
+        if self._first_snapshot is not None and tracemalloc.is_tracing():
+            # Taken before pstats runs, and without the profiler's own frames.
+            final = tracemalloc.take_snapshot().filter_traces(self._own_files)
+            w("\n== Top allocation sites still held after the crawl ==\n")
+            for stat in final.compare_to(self._first_snapshot, "lineno")[: self.top_n]:
+                w(f"{stat}\n")
+            tracemalloc.stop()
+
+        for name, st in self.stages.items():
+            st.profile.dump_stats(str(self.out_dir / f"{name}.pstats"))
+            w(f"\n== Top functions: {name} (by cumulative time) ==\n")
+            pstats.Stats(st.profile, stream=out).sort_stats("cumulative").print_stats(self.top_n)
+
+        w("\n== Allocations per page (top 5 by size change) ==\n")
+        for url, diffs in self.page_allocs:
+            w(f"{url}\n")
+            for d in diffs:
+                w(f"    {d}\n")
+
+        collapsed = self.out_dir / "stacks.collapsed"
+        collapsed.write_text(
+            "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common()),
+            encoding="utf-8",
+        )
+        report = self.out_dir / "report.txt"
+        report.write_text(out.getvalue(), encoding="utf-8")
+        logger.info("[profile] Wrote %s and %s", report, collapsed)
+        return report
+
+
+@contextmanager
+def no_stage(name: str) -> Iterator[None]:
+    yield
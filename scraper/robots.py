@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from urllib.parse import urljoin, urlparse
 from urllib.robotparser import RobotFileParser
 
@@ -11,11 +12,19 @@ class RobotsHandler:
     Uses Python's built-in RobotFileParser.
     """
 
-    def __init__(self, base_url: str, user_agent: str = "book-scraper"):
+    def __init__(
+        self,
+        base_url: str,
+        user_agent: str = "book-scraper",
+        robots_txt: Optional[str] = None,
+    ):
         self.base_url = base_url
         self.user_agent = user_agent
         self.rp = RobotFileParser()
-        self._load_robots()
+        if robots_txt is None:
+            self._load_robots()
+        else:
+            self.rp.parse(robots_txt.splitlines())
 
     def _load_robots(self) -> None:
         robots_url = urljoin(self.base_url, "/robots.txt")
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+from .store import JsonlWriter
+
+logger = logging.getLogger(__name__)
+
+SINKS = ("jsonl", "sqlite")
+
+
+class Sink(ABC):
+    """Destination for parsed items."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @abstractmethod
+    def write(self, items: Iterable[dict]) -> int:
+        """Stores items. Returns the number accepted."""
+
+    def refresh(self, items: Iterable[dict]) -> None:
+        """
+        Receives items re-seen on a page whose content has not changed.
+
+        Append-only sinks ignore them; current-state sinks keep them current.
+        """
+
+    def flush(self) -> None:
+        """Makes everything written so far durable."""
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlSink(Sink):
+    """Append-only JSONL output with the sidecar offset index."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._writer = JsonlWriter(self.path)
+
+    def write(self, items: Iterable[dict]) -> int:
+        return self._writer.write(items)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class SqliteSink(Sink):
+    """
+    Current-state store: one row per item key, updated in place.
+
+    Rows are buffered and flushed in batches, each batch one transaction of
+    ``INSERT ... ON CONFLICT(key) DO UPDATE``. ``first_seen`` is set on
+    insert only; ``last_seen`` is refreshed on every upsert, including for
+    items passed to ``refresh``.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS items (
+        key TEXT PRIMARY KEY,
+        site TEXT NOT NULL,
+        url TEXT NOT NULL,
+        title TEXT NOT NULL,
+        price REAL NOT NULL,
+        availability TEXT NOT NULL,
+        rating INTEGER NOT NULL,
+        category TEXT NOT NULL,
+        first_seen TEXT NOT NULL,
+        last_seen TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS items_category ON items(category);
+    CREATE INDEX IF NOT EXISTS items_price ON items(price);
+    CREATE INDEX IF NOT EXISTS items_rating ON items(rating);
+    """
+
+    _UPSERT = """
+    INSERT INTO items (key, site, url, title, price, availability, rating, category, first_seen, last_seen)
+    VALUES (:key, :site, :url, :title, :price, :availability, :rating, :category, :seen, :seen)
+    ON CONFLICT(key) DO UPDATE SET
+        site = excluded.site,
+        url = excluded.url,
+        title = excluded.title,
+        price = excluded.price,
+        availability = excluded.availability,
+        rating = excluded.rating,
+        category = excluded.category,
+        last_seen = excluded.last_seen
+    """
+
+    def __init__(self, path: Path, batch_size: int = 1000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(str(self.path), isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self._SCHEMA)
+        self._pending: list[dict] = []
+
+    def write(self, items: Iterable[dict]) -> int:
+        seen = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        n = 0
+        for it in items:
+            self._pending.append({**it, "seen": seen})
+            n += 1
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        return n
+
+    def refresh(self, items: Iterable[dict]) -> None:
+        self.write(items)
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(self._UPSERT, rows)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        logger.debug("[sink] Upserted %d rows into %s", len(rows), self.path)
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+
+
+def open_sink(kind: str, path: Path) -> Sink:
+    if kind == "jsonl":
+        return JsonlSink(path)
+    if kind == "sqlite":
+        return SqliteSink(path)
+    raise ValueError(f"Unknown sink {kind!r}; expected one of {', '.join(SINKS)}")
@@ -0,0 +1,445 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers to one path are not serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"BKSIDX01"
+# One entry per line: byte offset, byte length (without newline), key hash.
+_ENTRY = struct.Struct("<QIQ")
+
+_KEYS_MAGIC = b"BKSKEY01"
+# Magic, slot count (a power of two), used slots, index entries covered.
+_KEYS_HEADER = struct.Struct("<8sQQQ")
+# One slot: key hash, entry number + 1 (0 marks an empty slot).
+_SLOT = struct.Struct("<QQ")
+_MIN_SLOTS = 1024
+
+
+def index_path(data_path: Path) -> Path:
+    return data_path.with_name(data_path.name + ".idx")
+
+
+def keys_path(data_path: Path) -> Path:
+    return data_path.with_name(data_path.name + ".keys")
+
+
+def _key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _scan_lines(buf, start: int, end: int) -> Iterator[tuple[int, int, int]]:
+    """Yields index entries for complete lines in ``buf[start:end]``."""
+    pos = start
+    while pos < end:
+        nl = buf.find(b"\n", pos, end)
+        if nl == -1:
+            break
+        if nl > pos:
+            try:
+                key = json.loads(buf[pos:nl]).get("key", "")
+            except (ValueError, AttributeError):
+                key = ""
+            yield pos, nl - pos, _key_hash(key) if key else 0
+        pos = nl + 1
+
+
+def _indexed_end(idx_path: Path) -> tuple[int, int]:
+    """Returns (entry count, end offset of the last indexed line)."""
+    size = idx_path.stat().st_size if idx_path.exists() else 0
+    n = max(0, (size - len(_MAGIC)) // _ENTRY.size)
+    if n == 0:
+        return 0, 0
+    with idx_path.open("rb") as f:
+        f.seek(len(_MAGIC) + (n - 1) * _ENTRY.size)
+        offset, length, _ = _ENTRY.unpack(f.read(_ENTRY.size))
+    return n, offset + length + 1
+
+
+@contextmanager
+def _locked(f: IO[bytes]) -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _read_entries(idx_path: Path, start: int, stop: int) -> Iterator[tuple[int, int, int]]:
+    with idx_path.open("rb") as f:
+        f.seek(len(_MAGIC) + start * _ENTRY.size)
+        yield from _ENTRY.iter_unpack(f.read((stop - start) * _ENTRY.size))
+
+
+class _KeyTable:
+    """
+    Open-addressing hash table mapping key hash to the latest entry number.
+
+    Lives in a memory-mapped sidecar next to the offset index, so lookups
+    touch a few pages instead of loading every key. Probing is linear and
+    the table doubles once half full. Slots keep only one entry per 64-bit
+    hash; callers check the record's key to rule out collisions.
+    """
+
+    def __init__(self, mm: mmap.mmap, ino: int):
+        self.mm = mm
+        self.ino = ino
+        _, self.slots, self.used, self.covered = _KEYS_HEADER.unpack_from(mm, 0)
+
+    @classmethod
+    def open(cls, path: Path, writable: bool = False) -> Optional["_KeyTable"]:
+        if not path.exists() or path.stat().st_size < _KEYS_HEADER.size:
+            return None
+        with path.open("r+b" if writable else "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+            ino = os.fstat(f.fileno()).st_ino
+        magic, slots, _, _ = _KEYS_HEADER.unpack_from(mm, 0)
+        if magic != _KEYS_MAGIC or len(mm) != _KEYS_HEADER.size + slots * _SLOT.size:
+            mm.close()
+            return None
+        return cls(mm, ino)
+
+    @staticmethod
+    def create(path: Path, slots: int) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(_KEYS_HEADER.pack(_KEYS_MAGIC, slots, 0, 0))
+            f.truncate(_KEYS_HEADER.size + slots * _SLOT.size)
+        os.replace(tmp, path)
+
+    def close(self) -> None:
+        self.mm.close()
+
+    def current(self, path: Path) -> bool:
+        """Re-reads the header; False if ``path`` now holds a different table."""
+        try:
+            if os.stat(path).st_ino != self.ino:
+                return False
+        except FileNotFoundError:
+            return False
+        _, self.slots, self.used, self.covered = _KEYS_HEADER.unpack_from(self.mm, 0)
+        return True
+
+    def lookup(self, h: int) -> Optional[int]:
+        mask = self.slots - 1
+        i = h & mask
+        while True:
+            slot_hash, entry = _SLOT.unpack_from(self.mm, _KEYS_HEADER.size + i * _SLOT.size)
+            if entry == 0:
+                return None
+            if slot_hash == h:
+                return entry - 1
+            i = (i + 1) & mask
+
+    def put(self, h: int, entry_no: int) -> None:
+        mask = self.slots - 1
+        i = h & mask
+        while True:
+            at = _KEYS_HEADER.size + i * _SLOT.size
+            slot_hash, entry = _SLOT.unpack_from(self.mm, at)
+            if entry == 0 or slot_hash == h:
+                _SLOT.pack_into(self.mm, at, h, entry_no + 1)
+                if entry == 0:
+                    self.used += 1
+                return
+            i = (i + 1) & mask
+
+    def items(self) -> Iterator[tuple[int, int]]:
+        for h, entry in _SLOT.iter_unpack(self.mm[_KEYS_HEADER.size :]):
+            if entry:
+                yield h, entry - 1
+
+    def commit(self, covered: int) -> None:
+        self.covered = covered
+        _KEYS_HEADER.pack_into(self.mm, 0, _KEYS_MAGIC, self.slots, self.used, covered)
+
+
+class JsonlWriter:
+    """
+    Appends JSON lines and keeps the sidecar offset index in step.
+
+    If the data file has lines the index does not cover (written by an older
+    version, or a crash between the two writes), they are indexed on open.
+    The key table sidecar is brought up to date with the index the same way.
+
+    Several writers (threads or processes) may append to the same path. Each
+    ``write`` holds an exclusive ``flock`` on the data file and takes offsets
+    from the file sizes at that moment, so interleaved batches index correctly.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.idx_path = index_path(self.path)
+        self.keys_path = keys_path(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._data = self.path.open("ab")
+        with _locked(self._data):
+            count = self._reconcile()
+            self._keys = self._open_keys(count)
+        self._idx = self.idx_path.open("a+b")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        self._data.close()
+        self._idx.close()
+        self._keys.close()
+
+    def _reconcile(self) -> int:
+        """Brings the index up to date with the data file. Returns its entry count."""
+        data_size = self.path.stat().st_size if self.path.exists() else 0
+        if not self.idx_path.exists() or self.idx_path.stat().st_size < len(_MAGIC):
+            self.idx_path.write_bytes(_MAGIC)
+        with self.idx_path.open("rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"Not a store index: {self.idx_path}")
+
+        n, end = _indexed_end(self.idx_path)
+        if end > data_size:
+            logger.warning("[store] Index ahead of %s; rebuilding", self.path)
+            self.idx_path.write_bytes(_MAGIC)
+            self.keys_path.unlink(missing_ok=True)
+            n, end = 0, 0
+        else:
+            # Drop any torn trailing entry.
+            os.truncate(self.idx_path, len(_MAGIC) + n * _ENTRY.size)
+
+        if end < data_size:
+            with self.path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                entries = [_ENTRY.pack(*e) for e in _scan_lines(mm, end, data_size)]
+            with self.idx_path.open("ab") as f:
+                f.write(b"".join(entries))
+            logger.info("[store] Indexed %d unindexed lines in %s", len(entries), self.path)
+            n += len(entries)
+        return n
+
+    def _indexed_count(self, data_size: int) -> int:
+        """Index entries on disk, reconciling first if they do not end at ``data_size``."""
+        idx_size = os.fstat(self._idx.fileno()).st_size
+        n, torn = divmod(idx_size - len(_MAGIC), _ENTRY.size)
+        end = 0
+        if n > 0:
+            self._idx.seek(idx_size - torn - _ENTRY.size)
+            offset, length, _ = _ENTRY.unpack(self._idx.read(_ENTRY.size))
+            end = offset + length + 1
+        if torn or end != data_size:
+            n = self._reconcile()
+        return n
+
+    def _open_keys(self, count: int) -> _KeyTable:
+        table = _KeyTable.open(self.keys_path, writable=True)
+        if table is not None and table.covered > count:
+            table.close()
+            table = None
+        if table is None:
+            _KeyTable.create(self.keys_path, _MIN_SLOTS)
+            table = _KeyTable.open(self.keys_path, writable=True)
+        if table.covered < count:
+            start = table.covered
+            hashes = [h for _, _, h in _read_entries(self.idx_path, start, count)]
+            table = self._add_keys(table, start, hashes)
+            logger.info("[store] Added %d index entries to %s", len(hashes), self.keys_path)
+        return table
+
+    def _add_keys(self, table: _KeyTable, start: int, hashes: list[int]) -> _KeyTable:
+        """Adds entries ``start, start + 1, ...`` with these key hashes (0 = no key)."""
+        if 2 * (table.used + len(hashes)) > table.slots:
+            slots = table.slots
+            while 2 * (table.used + len(hashes)) > slots:
+                slots *= 2
+            old = list(table.items())
+            table.close()
+            _KeyTable.create(self.keys_path, slots)
+            table = _KeyTable.open(self.keys_path, writable=True)
+            for h, n in old:
+                table.put(h, n)
+        for n, h in enumerate(hashes, start):
+            if h:
+                table.put(h, n)
+        table.commit(start + len(hashes))
+        return table
+
+    def write(self, items: Iterable[dict]) -> int:
+        lines: list[bytes] = []
+        hashes: list[int] = []
+        for it in items:
+            key = it.get("key", "")
+            lines.append(json.dumps(it, ensure_ascii=False).encode("utf-8"))
+            hashes.append(_key_hash(key) if key else 0)
+        if not lines:
+            return 0
+
+        with _locked(self._data):
+            pos = os.fstat(self._data.fileno()).st_size
+            count = self._indexed_count(pos)
+            entries: list[bytes] = []
+            for line, h in zip(lines, hashes):
+                entries.append(_ENTRY.pack(pos, len(line), h))
+                pos += len(line) + 1
+
+            self._data.write(b"\n".join(lines) + b"\n")
+            self._data.flush()
+            self._idx.write(b"".join(entries))
+            self._idx.flush()
+
+            # Another writer may have grown (replaced) or extended the table.
+            if not self._keys.current(self.keys_path) or self._keys.covered != count:
+                self._keys.close()
+                self._keys = self._open_keys(count)
+            self._keys = self._add_keys(self._keys, count, hashes)
+        return len(lines)
+
+
+def append_items(path: Path, items: Iterable[dict]) -> int:
+    with JsonlWriter(path) as w:
+        return w.write(items)
+
+
+class JsonlStore:
+    """
+    Random-access reader over a JSONL file and its sidecar index.
+
+    Records are read through ``mmap``; ``raw()`` returns a zero-copy
+    memoryview of one line. ``get(key)`` returns the latest record with that
+    key by probing the on-disk key table. Lines the key table or the index
+    do not cover yet are keyed in memory.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.idx_path = index_path(self.path)
+        self.keys_path = keys_path(self.path)
+        self._mm: Optional[mmap.mmap] = None
+        self._idx_mm: Optional[mmap.mmap] = None
+        self._keys: Optional[_KeyTable] = None
+        self._tail: list[tuple[int, int, int]] = []
+        self._recent: Optional[dict[int, int]] = None
+        self._n_indexed = 0
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        for mm in (self._mm, self._idx_mm):
+            if mm is not None:
+                mm.close()
+        if self._keys is not None:
+            self._keys.close()
+        self._mm = self._idx_mm = self._keys = None
+
+    @staticmethod
+    def _map(path: Path) -> Optional[mmap.mmap]:
+        if not path.exists() or path.stat().st_size == 0:
+            return None
+        with path.open("rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def refresh(self) -> None:
+        """Re-maps the files to pick up records appended since opening."""
+        self.close()
+        self._mm = self._map(self.path)
+        self._idx_mm = self._map(self.idx_path)
+        self._keys = _KeyTable.open(self.keys_path)
+        self._recent = None
+
+        data_size = len(self._mm) if self._mm is not None else 0
+        n, end = 0, 0
+        if self._idx_mm is not None and self._idx_mm[: len(_MAGIC)] == _MAGIC:
+            n = (len(self._idx_mm) - len(_MAGIC)) // _ENTRY.size
+            while n:
+                off, length, _ = _ENTRY.unpack_from(self._idx_mm, len(_MAGIC) + (n - 1) * _ENTRY.size)
+                if off + length < data_size:
+                    end = off + length + 1
+                    break
+                n -= 1
+        self._n_indexed = n
+        self._tail = list(_scan_lines(self._mm, end, data_size)) if self._mm is not None else []
+
+    def _entry(self, i: int) -> tuple[int, int, int]:
+        if i < self._n_indexed:
+            return _ENTRY.unpack_from(self._idx_mm, len(_MAGIC) + i * _ENTRY.size)
+        return self._tail[i - self._n_indexed]
+
+    def __len__(self) -> int:
+        return self._n_indexed + len(self._tail)
+
+    def raw(self, i: int) -> memoryview:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        off, length, _ = self._entry(i)
+        return memoryview(self._mm)[off : off + length]
+
+    def __getitem__(self, i: int) -> dict:
+        with self.raw(i) as mv:
+            return json.loads(mv.tobytes())
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.range(0, len(self))
+
+    def range(self, start: int, stop: Optional[int] = None) -> Iterator[dict]:
+        stop = len(self) if stop is None else min(stop, len(self))
+        for i in range(max(0, start), stop):
+            yield self[i]
+
+    def _covered(self) -> int:
+        return min(self._keys.covered, self._n_indexed) if self._keys is not None else 0
+
+    def _recent_keys(self) -> dict[int, int]:
+        if self._recent is None:
+            recent: dict[int, int] = {}
+            for i in range(self._covered(), len(self)):
+                h = self._entry(i)[2]
+                if h:
+                    recent[h] = i
+            self._recent = recent
+        return self._recent
+
+    def _find(self, h: int) -> Optional[int]:
+        i = self._recent_keys().get(h)
+        if i is not None or self._keys is None:
+            return i
+        i = self._keys.lookup(h)
+        if i is None or i < len(self):
+            return i
+        # The key was rewritten after refresh(); its older entry is still
+        # somewhere in our view.
+        for j in range(min(len(self), self._covered()) - 1, -1, -1):
+            if self._entry(j)[2] == h:
+                return j
+        return None
+
+    def get(self, key: str) -> Optional[dict]:
+        i = self._find(_key_hash(key))
+        if i is None:
+            return None
+        rec = self[i]
+        return rec if rec.get("key") == key else None
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
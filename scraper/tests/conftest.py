@@ -0,0 +1,34 @@
+import pytest
+
+
+class FakeFetcher:
+    """Serves canned HTML by URL and records what was fetched."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    def get_text(self, url):
+        self.fetched.append(url)
+        return self.pages[url]
+
+    def close(self):
+        pass
+
+
+class AllowAll:
+    def can_fetch(self, url):
+        return True
+
+    def get_crawl_delay_ms(self):
+        return 0
+
+
+@pytest.fixture
+def fake_fetcher():
+    return FakeFetcher
+
+
+@pytest.fixture
+def allow_all():
+    return AllowAll()
@@ -0,0 +1,221 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from scraper import daemon as daemon_module
+from scraper.daemon import CrawlDaemon, CronSchedule, JobSpec, _make_handler
+
+PAGE = """
+<html><body>
+  <article class="product_pod">
+    <h3><a href="catalogue/book-1/index.html" title="Book 1">Book 1</a></h3>
+    <p class="price_color">£10.00</p>
+  </article>
+</body></html>
+"""
+
+
+def test_cron_hourly_alias():
+    cron = CronSchedule("@hourly")
+    assert cron.next_after(datetime(2024, 5, 1, 10, 15)) == datetime(2024, 5, 1, 11, 0)
+
+
+def test_cron_steps_ranges_and_weekdays():
+    cron = CronSchedule("*/20 9-17 * * 1-5")
+    # Friday 17:45 -> next Monday 09:00
+    assert cron.next_after(datetime(2024, 5, 3, 17, 45)) == datetime(2024, 5, 6, 9, 0)
+    assert cron.next_after(datetime(2024, 5, 6, 9, 0)) == datetime(2024, 5, 6, 9, 20)
+
+
+def test_cron_rejects_bad_expressions():
+    with pytest.raises(ValueError):
+        CronSchedule("* * *")
+    with pytest.raises(ValueError):
+        CronSchedule("61 * * * *")
+
+
+def test_triggered_jobs_reuse_warm_fetcher(tmp_path, fake_fetcher, allow_all):
+    fetchers = []
+    robots_loads = []
+
+    def fetcher_factory(config):
+        fetcher = fake_fetcher({"https://books.test/": PAGE})
+        fetcher.config = config
+        fetchers.append(fetcher)
+        return fetcher
+
+    def robots_factory(base):
+        robots_loads.append(base)
+        return allow_all
+
+    daemon = CrawlDaemon(
+        [JobSpec(name="prices", start="https://books.test/", max_pages=1)],
+        max_jobs=1,
+        data_dir=tmp_path,
+        fetcher_factory=fetcher_factory,
+        robots_factory=robots_factory,
+    )
+    assert daemon.trigger("prices") is True
+    daemon._executor.submit(lambda: None).result()
+    assert daemon.trigger("prices") is True
+    assert daemon.trigger("missing") is False
+    daemon.close()
+
+    status = daemon.status()["prices"]
+    assert status["runs"] == 2 and status["last_error"] is None
+    assert len(fetchers) == 1
+    assert robots_loads == ["https://books.test/"]
+    lines = (tmp_path / "items.jsonl").read_text().splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["Book 1", "Book 1"]
+
+
+def _gated_factory(fake_fetcher, gate, started):
+    """Fetchers that report each fetch in ``started`` and then wait for ``gate``."""
+
+    def factory(config):
+        fetcher = fake_fetcher({"https://a.test/": PAGE, "https://b.test/": PAGE})
+        fetcher.config = config
+        get_text = fetcher.get_text
+
+        def gated_get_text(url):
+            started.append(url)
+            assert gate.wait(5)
+            return get_text(url)
+
+        fetcher.get_text = gated_get_text
+        return fetcher
+
+    return factory
+
+
+def _wait_until(predicate, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_same_site_jobs_queue_outside_the_executor(tmp_path, fake_fetcher, allow_all):
+    gate, started = threading.Event(), []
+    daemon = CrawlDaemon(
+        [
+            JobSpec(name="a1", start="https://a.test/", max_pages=1, dry_run=True),
+            JobSpec(name="a2", start="https://a.test/", max_pages=1, dry_run=True),
+            JobSpec(name="b", start="https://b.test/", max_pages=1, dry_run=True),
+        ],
+        max_jobs=2,
+        data_dir=tmp_path,
+        fetcher_factory=_gated_factory(fake_fetcher, gate, started),
+        robots_factory=lambda base: allow_all,
+    )
+    try:
+        assert daemon.trigger("a1") and daemon.trigger("a2") and daemon.trigger("b")
+        # a2 waits for a1 without taking the second slot, so b starts at once.
+        _wait_until(lambda: sorted(started) == ["https://a.test/", "https://b.test/"])
+        time.sleep(0.05)
+        assert len(started) == 2
+        assert daemon.status()["a2"]["runs"] == 0
+    finally:
+        gate.set()
+        daemon.close()
+
+    status = daemon.status()
+    assert all(s["runs"] == 1 and s["last_error"] is None for s in status.values())
+    assert started.count("https://a.test/") == 2
+
+
+def _call(method, url):
+    request = urllib.request.Request(url, method=method, data=b"" if method == "POST" else None)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_trigger_endpoint(tmp_path, fake_fetcher, allow_all):
+    gate, started = threading.Event(), []
+    daemon = CrawlDaemon(
+        [JobSpec(name="prices", start="https://a.test/", max_pages=1, dry_run=True)],
+        data_dir=tmp_path,
+        fetcher_factory=_gated_factory(fake_fetcher, gate, started),
+        robots_factory=lambda base: allow_all,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(daemon))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        assert _call("POST", f"{base}/jobs/prices/run") == (
+            202,
+            {"job": "prices", "status": "started"},
+        )
+        _wait_until(lambda: started)
+        assert _call("POST", f"{base}/jobs/prices/run") == (
+            409,
+            {"job": "prices", "status": "already running"},
+        )
+        assert _call("POST", f"{base}/jobs/missing/run")[0] == 404
+        assert _call("POST", f"{base}/nope")[0] == 404
+
+        code, body = _call("GET", f"{base}/jobs")
+        assert code == 200
+        assert body["prices"]["running"] is True and body["prices"]["runs"] == 0
+    finally:
+        gate.set()
+        server.shutdown()
+        server.server_close()
+        daemon.close()
+
+    status = daemon.status()["prices"]
+    assert status["runs"] == 1 and status["running"] is False
+
+
+def test_run_forever_fires_due_jobs(tmp_path, fake_fetcher, allow_all, monkeypatch):
+    # Shift the daemon's clock so the next minute boundary is 0.2s away.
+    real_now = datetime.now()
+    boundary = real_now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    shift = boundary - real_now - timedelta(seconds=0.2)
+
+    class ShiftedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + shift
+
+    monkeypatch.setattr(daemon_module, "datetime", ShiftedDatetime)
+
+    pages = {"https://books.test/": PAGE}
+    daemon = CrawlDaemon(
+        [
+            JobSpec(
+                name="every-minute",
+                start="https://books.test/",
+                max_pages=1,
+                schedule="* * * * *",
+            ),
+            JobSpec(name="manual", start="https://books.test/", max_pages=1),
+        ],
+        data_dir=tmp_path,
+        fetcher_factory=lambda config: fake_fetcher(pages),
+        robots_factory=lambda base: allow_all,
+    )
+    loop = threading.Thread(target=daemon.run_forever)
+    loop.start()
+    try:
+        _wait_until(lambda: daemon.status()["every-minute"]["runs"] == 1)
+    finally:
+        daemon.stop()
+        loop.join(5)
+        daemon.close()
+
+    assert not loop.is_alive()
+    status = daemon.status()
+    assert status["every-minute"]["last_error"] is None
+    next_run = datetime.fromisoformat(status["every-minute"]["next_run"])
+    assert next_run == boundary + timedelta(minutes=1)
+    assert status["manual"]["runs"] == 0 and status["manual"]["next_run"] is None
@@ -0,0 +1,53 @@
+import argparse
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+
+from scraper import main
+
+FIXTURES = Path(__file__).parent / "fixtures" / "books"
+
+
+def _run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["scraper.main", "--offline", str(FIXTURES), "--delay-ms=0", *argv])
+    return main.run()
+
+
+def test_offline_runs_keep_history_away_from_live_history(tmp_path, monkeypatch):
+    live = tmp_path / "data" / "history.db"
+    monkeypatch.setattr(main, "LIVE_HISTORY_PATH", live)
+    out = tmp_path / "out" / "items.jsonl"
+
+    assert _run(monkeypatch, "--out", str(out)) == 0
+    assert _run(monkeypatch, "--profile", str(tmp_path / "profile"), "--out", str(tmp_path / "p.jsonl")) == 0
+    assert _run(monkeypatch, "--out", str(out), "--plan") == 0
+
+    assert not live.exists()
+    assert (tmp_path / "out" / "items.jsonl.history.db").exists()
+    assert (tmp_path / "p.jsonl.history.db").exists()
+
+
+def test_offline_history_falls_back_to_profile_dir(tmp_path, monkeypatch):
+    live = tmp_path / "data" / "history.db"
+    monkeypatch.setattr(main, "LIVE_HISTORY_PATH", live)
+    args = argparse.Namespace(no_history=False, history=None, offline="x", out=None, profile="prof")
+    assert main._history_path(args) == Path("prof") / "history.db"
+    args.profile = None
+    assert main._history_path(args) is None
+    args.offline = None
+    assert main._history_path(args) == live
+
+
+def test_interrupted_profiled_run_still_writes_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "LIVE_HISTORY_PATH", tmp_path / "data" / "history.db")
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(main, "crawl", interrupted)
+    profile = tmp_path / "profile"
+    assert _run(monkeypatch, "--profile", str(profile), "--out", str(tmp_path / "items.jsonl")) == 130
+    assert (profile / "report.txt").exists()
+    assert not tracemalloc.is_tracing()
+    assert not any(t.name == "profiler-sampler" for t in threading.enumerate())
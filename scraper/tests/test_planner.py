@@ -0,0 +1,149 @@
+import math
+import sqlite3
+
+import pytest
+
+from scraper.main import crawl_planned
+from scraper.planner import PageHistory, PlannerConfig, content_hash, plan
+from scraper.sinks import SqliteSink
+
+HOUR = 3600.0
+
+
+def _page(title, next_href=None):
+    pager = f'<ul class="pager"><li class="next"><a href="{next_href}">next</a></li></ul>' if next_href else ""
+    return f"""
+    <html><body>
+      <article class="product_pod">
+        <h3><a href="catalogue/{title}/index.html" title="{title}">{title}</a></h3>
+        <p class="price_color">£10.00</p>
+      </article>
+      {pager}
+    </body></html>
+    """
+
+
+class _ListSink:
+    def __init__(self):
+        self.items = []
+        self.refreshed = []
+
+    def write(self, items):
+        self.items.extend(items)
+        return len(items)
+
+    def refresh(self, items):
+        self.refreshed.extend(items)
+
+    def flush(self):
+        pass
+
+
+def test_record_counts_changes_and_estimates_rate(tmp_path):
+    with PageHistory(tmp_path / "h.db") as h:
+        assert h.record("u", "a", now=0) is True
+        assert h.record("u", "a", now=HOUR) is False
+        assert h.record("u", "b", now=2 * HOUR) is True
+        rec = h.get("u")
+    assert (rec.fetches, rec.changes, rec.interval_total_s) == (3, 1, 2 * HOUR)
+    expected = -math.log((2 - 1 + 0.5) / (2 + 0.5)) / HOUR
+    assert math.isclose(rec.change_rate(24 * HOUR), expected)
+
+
+def test_plan_orders_new_overdue_then_likely_changed(tmp_path):
+    now = 100 * HOUR
+    with PageHistory(tmp_path / "h.db") as h:
+        # Changes on every fetch, last seen 2h ago.
+        for t, d in [(90, "a"), (94, "b"), (98, "c")]:
+            h.record("hot", d, now=t * HOUR)
+        # Never changes across many hourly fetches, last seen 1h ago.
+        for t in range(50, 100):
+            h.record("cold", "same", now=t * HOUR)
+        # Not fetched for longer than the SLA.
+        h.record("stale", "x", now=now - 30 * HOUR)
+
+        cfg = PlannerConfig(freshness_sla_s=24 * HOUR, budget=10, min_sample_prob=0.05, seed=1)
+        result = plan(h, ["seed", "hot"], cfg, now=now)
+
+    assert [(p.url, p.reason) for p in result][:3] == [
+        ("seed", "new"),
+        ("stale", "overdue"),
+        ("hot", "likely-changed"),
+    ]
+    assert "cold" not in {p.url for p in result} or result[-1].reason == "sampled"
+
+
+def test_plan_respects_budget(tmp_path):
+    with PageHistory(tmp_path / "h.db") as h:
+        for i in range(5):
+            h.record(f"p{i}", "x", now=0)
+        result = plan(h, [], PlannerConfig(freshness_sla_s=HOUR, budget=2), now=10 * HOUR)
+    assert len(result) == 2
+
+
+def test_crawl_planned_skips_unchanged_pages_and_discovers_new(tmp_path, fake_fetcher, allow_all):
+    pages = {
+        "https://books.test/": _page("one", "page-2.html"),
+        "https://books.test/page-2.html": _page("two"),
+    }
+    cfg = PlannerConfig(freshness_sla_s=0, budget=10)
+    with PageHistory(tmp_path / "h.db") as h:
+        sink = _ListSink()
+        first = crawl_planned(
+            "https://books.test/", fetcher=fake_fetcher(pages), robots=allow_all, history=h, config=cfg, sink=sink
+        )
+        assert first.pages == 2 and len(sink.items) == 2
+
+        pages["https://books.test/page-2.html"] = _page("three")
+        sink = _ListSink()
+        second = crawl_planned(
+            "https://books.test/", fetcher=fake_fetcher(pages), robots=allow_all, history=h, config=cfg, sink=sink
+        )
+    assert second.pages == 2 and second.unchanged_pages == 1
+    assert [it["title"] for it in sink.items] == ["three"]
+    assert [it["title"] for it in sink.refreshed] == ["one"]
+
+
+def test_crawl_planned_keeps_sqlite_rows_current_for_unchanged_pages(tmp_path, fake_fetcher, allow_all):
+    pages = {"https://books.test/": _page("one")}
+    cfg = PlannerConfig(freshness_sla_s=0, budget=10)
+    with PageHistory(tmp_path / "h.db") as h:
+        with SqliteSink(tmp_path / "items.db") as sink:
+            crawl_planned("https://books.test/", fetcher=fake_fetcher(pages), robots=allow_all, history=h, config=cfg, sink=sink)
+            sink.conn.execute("DELETE FROM items")
+        with SqliteSink(tmp_path / "items.db") as sink:
+            result = crawl_planned(
+                "https://books.test/", fetcher=fake_fetcher(pages), robots=allow_all, history=h, config=cfg, sink=sink
+            )
+    assert result.unchanged_pages == 1 and result.items_written == 0
+    rows = sqlite3.connect(str(tmp_path / "items.db")).execute("SELECT title FROM items").fetchall()
+    assert rows == [("one",)]
+
+
+def test_content_hash_depends_on_parsed_fields_only():
+    items = [{"key": "k", "price": 1.0}]
+    assert content_hash(items, None) == content_hash([{"price": 1.0, "key": "k"}], None)
+    assert content_hash(items, None) != content_hash(items, "next")
+
+
+def test_page_is_not_recorded_when_its_items_fail_to_write(tmp_path, fake_fetcher, allow_all):
+    class FailingFlushSink(_ListSink):
+        def flush(self):
+            raise OSError("disk full")
+
+    pages = {"https://books.test/": _page("one")}
+    cfg = PlannerConfig(freshness_sla_s=0, budget=10)
+    with PageHistory(tmp_path / "h.db") as h:
+        with pytest.raises(OSError):
+            crawl_planned(
+                "https://books.test/", fetcher=fake_fetcher(pages), robots=allow_all, history=h, config=cfg,
+                sink=FailingFlushSink(),
+            )
+        assert "https://books.test/" not in h
+
+        sink = _ListSink()
+        result = crawl_planned(
+            "https://books.test/", fetcher=fake_fetcher(pages), robots=allow_all, history=h, config=cfg, sink=sink
+        )
+    assert result.unchanged_pages == 0
+    assert [it["title"] for it in sink.items] == ["one"]
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from scraper.fetcher import Fetcher, FetcherConfig, fixture_transport
+from scraper.main import crawl
+from scraper.profiling import CrawlProfiler
+from scraper.robots import RobotsHandler
+from scraper.sinks import JsonlSink
+
+FIXTURES = Path(__file__).parent / "fixtures" / "books"
+
+
+def test_fixture_transport_serves_files_and_404s():
+    with Fetcher(FetcherConfig(base_delay_ms=0, max_retries=1), transport=fixture_transport(FIXTURES)) as f:
+        assert "product_pod" in f.get_text("https://books.toscrape.com/")
+        assert "Page 2 of 3" in f.get_text("https://books.toscrape.com/catalogue/page-2.html")
+
+
+def test_profiled_offline_crawl_writes_report(tmp_path):
+    robots = RobotsHandler(
+        "https://books.toscrape.com/", robots_txt=(FIXTURES / "robots.txt").read_text()
+    )
+    profiler = CrawlProfiler(tmp_path / "profile", sample_interval_s=0.001)
+    cfg = FetcherConfig(base_delay_ms=0)
+
+    profiler.start()
+    with Fetcher(cfg, transport=fixture_transport(FIXTURES)) as fetcher, JsonlSink(tmp_path / "items.jsonl") as sink:
+        result = crawl(
+            "https://books.toscrape.com/",
+            fetcher=fetcher,
+            robots=robots,
+            max_pages=5,
+            sink=sink,
+            profiler=profiler,
+        )
+    profiler.stop()
+    report = profiler.write_report()
+
+    assert result.pages == 3 and result.items_written == 60
+    assert {name: st.calls for name, st in profiler.stages.items()} == {"fetch": 3, "parse": 3, "write": 3}
+    text = report.read_text()
+    assert "Top functions: parse" in text
+    assert "parse_books_list" in text
+    assert len(profiler.page_allocs) == 3
+    own = {"tracemalloc.py", "cProfile.py", "profiling.py"}
+    for _, diffs in profiler.page_allocs:
+        assert not {Path(d.traceback[0].filename).name for d in diffs} & own
+    for name in ("fetch", "parse", "write"):
+        assert (tmp_path / "profile" / f"{name}.pstats").exists()
+    collapsed = (tmp_path / "profile" / "stacks.collapsed").read_text().splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed)
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from scraper.sinks import Sink, SqliteSink, open_sink
+
+
+def _item(key, price):
+    return {
+        "key": key,
+        "site": "books",
+        "url": key,
+        "title": "Book",
+        "price": price,
+        "availability": "In stock",
+        "rating": 3,
+        "category": "Travel",
+    }
+
+
+def test_sqlite_upsert_updates_in_place_and_keeps_first_seen(tmp_path):
+    db = tmp_path / "items.db"
+    with SqliteSink(db, batch_size=2) as sink:
+        assert sink.write([_item("a", 10.0), _item("b", 5.0), _item("c", 1.0)]) == 3
+
+    conn = sqlite3.connect(db)
+    conn.execute("UPDATE items SET first_seen = '2000-01-01T00:00:00+00:00', last_seen = first_seen")
+    conn.commit()
+
+    with SqliteSink(db) as sink:
+        sink.write([_item("a", 12.5)])
+
+    rows = conn.execute("SELECT key, price, first_seen, last_seen FROM items ORDER BY key").fetchall()
+    assert [(k, p) for k, p, _, _ in rows] == [("a", 12.5), ("b", 5.0), ("c", 1.0)]
+    a = rows[0]
+    assert a[2] == "2000-01-01T00:00:00+00:00"
+    assert a[3] > a[2]
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {r[1] for r in conn.execute("PRAGMA index_list(items)")}
+    assert {"items_category", "items_price", "items_rating"} <= indexes
+    conn.close()
+
+
+def test_open_sink_rejects_unknown_kind(tmp_path):
+    with pytest.raises(ValueError):
+        open_sink("parquet", tmp_path / "x")
+
+
+def test_sink_requires_write():
+    class NoWrite(Sink):
+        pass
+
+    with pytest.raises(TypeError):
+        NoWrite()
@@ -0,0 +1,127 @@
+import json
+import threading
+
+from scraper.store import JsonlStore, JsonlWriter, append_items, index_path, keys_path
+
+
+def _item(n, price=1.0):
+    return {"key": f"https://books.test/{n}", "title": f"Book {n}", "price": price}
+
+
+def test_point_lookup_and_range(tmp_path):
+    path = tmp_path / "items.jsonl"
+    append_items(path, [_item(i) for i in range(5)])
+    append_items(path, [_item(5), _item(2, price=9.5)])
+
+    with JsonlStore(path) as store:
+        assert len(store) == 7
+        assert store[0]["title"] == "Book 0"
+        assert store[-1]["price"] == 9.5
+        assert [r["title"] for r in store.range(3, 5)] == ["Book 3", "Book 4"]
+        assert store.get("https://books.test/2")["price"] == 9.5
+        assert store.get("https://books.test/missing") is None
+        assert bytes(store.raw(1)) == json.dumps(_item(1)).encode()
+
+
+def test_unindexed_lines_are_picked_up(tmp_path):
+    path = tmp_path / "items.jsonl"
+    path.write_text("".join(json.dumps(_item(i)) + "\n" for i in range(3)))
+
+    with JsonlStore(path) as store:
+        assert store.get("https://books.test/1")["title"] == "Book 1"
+
+    with JsonlWriter(path) as w:
+        w.write([_item(3)])
+    with JsonlStore(path) as store:
+        assert len(store) == 4
+        assert store.get("https://books.test/3")["title"] == "Book 3"
+
+
+def test_refresh_sees_appended_records(tmp_path):
+    path = tmp_path / "items.jsonl"
+    append_items(path, [_item(0)])
+    store = JsonlStore(path)
+    append_items(path, [_item(1)])
+    assert len(store) == 1
+    store.refresh()
+    assert store.get("https://books.test/1")["title"] == "Book 1"
+    store.close()
+
+
+def test_index_ahead_of_data_is_rebuilt(tmp_path):
+    path = tmp_path / "items.jsonl"
+    append_items(path, [_item(0), _item(1)])
+    path.write_text(json.dumps(_item(0)) + "\n")
+
+    append_items(path, [_item(2)])
+    with JsonlStore(path) as store:
+        assert [r["title"] for r in store] == ["Book 0", "Book 2"]
+    assert index_path(path).exists()
+
+
+def test_empty_store(tmp_path):
+    with JsonlStore(tmp_path / "none.jsonl") as store:
+        assert len(store) == 0
+        assert store.get("x") is None
+
+
+def test_key_table_grows_and_survives_reopen(tmp_path):
+    path = tmp_path / "items.jsonl"
+    with JsonlWriter(path) as w:
+        for start in range(0, 3000, 500):
+            w.write([_item(i) for i in range(start, start + 500)])
+    append_items(path, [_item(7, price=2.5)])
+    assert keys_path(path).exists()
+
+    with JsonlStore(path) as store:
+        assert store._recent_keys() == {}
+        assert store.get("https://books.test/2999")["title"] == "Book 2999"
+        assert store.get("https://books.test/7")["price"] == 2.5
+        assert store.get("https://books.test/3000") is None
+
+
+def test_key_rewritten_after_open_returns_record_in_view(tmp_path):
+    path = tmp_path / "items.jsonl"
+    append_items(path, [_item(0), _item(1)])
+    with JsonlStore(path) as store:
+        append_items(path, [_item(0, price=5.0)])
+        assert store.get("https://books.test/0")["price"] == 1.0
+        store.refresh()
+        assert store.get("https://books.test/0")["price"] == 5.0
+
+
+def test_interleaved_writers_on_one_path(tmp_path):
+    path = tmp_path / "items.jsonl"
+    with JsonlWriter(path) as w1, JsonlWriter(path) as w2:
+        w1.write([_item(0)])
+        w2.write([_item(1), _item(2)])
+        w1.write([_item(3)])
+        w2.write([_item(i) for i in range(4, 1200)])
+        w1.write([_item(0, price=7.0)])
+
+    with JsonlStore(path) as store:
+        assert [r["title"] for r in store.range(0, 4)] == ["Book 0", "Book 1", "Book 2", "Book 3"]
+        assert len(store) == 1201
+        assert store.get("https://books.test/0")["price"] == 7.0
+        assert store.get("https://books.test/1199")["title"] == "Book 1199"
+        assert store._recent_keys() == {}
+
+
+def test_concurrent_writer_threads(tmp_path):
+    path = tmp_path / "items.jsonl"
+
+    def work(t):
+        with JsonlWriter(path) as w:
+            for i in range(50):
+                w.write([_item(f"{t}-{i}-{j}") for j in range(5)])
+
+    threads = [threading.Thread(target=work, args=(t,)) for t in range(4)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    with JsonlStore(path) as store:
+        assert len(store) == 1000
+        assert all(r["key"].startswith("https://books.test/") for r in store)
+        assert store.get("https://books.test/3-49-4")["title"] == "Book 3-49-4"
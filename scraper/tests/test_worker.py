@@ -0,0 +1,101 @@
+import json
+import time
+
+import pytest
+
+from scraper.sinks import JsonlSink
+from scraper.worker import work
+from scraper.workqueue import DONE, QueueConfig, SqliteWorkQueue
+
+PAGE_1 = """
+<html><body>
+  <article class="product_pod">
+    <h3><a href="catalogue/book-1/index.html" title="Book 1">Book 1</a></h3>
+    <p class="price_color">£10.00</p>
+  </article>
+  <ul class="pager"><li class="next"><a href="page-2.html">next</a></li></ul>
+</body></html>
+"""
+
+PAGE_2 = """
+<html><body>
+  <article class="product_pod">
+    <h3><a href="catalogue/book-1/index.html" title="Book 1">Book 1</a></h3>
+    <p class="price_color">£10.00</p>
+  </article>
+  <article class="product_pod">
+    <h3><a href="catalogue/book-2/index.html" title="Book 2">Book 2</a></h3>
+    <p class="price_color">£12.00</p>
+  </article>
+</body></html>
+"""
+
+
+def test_two_workers_drain_queue_without_duplicate_items(tmp_path, fake_fetcher, allow_all):
+    pages = {
+        "https://books.test/": PAGE_1,
+        "https://books.test/page-2.html": PAGE_2,
+    }
+    out = tmp_path / "items.jsonl"
+    cfg = QueueConfig(default_delay_ms=0)
+
+    with SqliteWorkQueue(tmp_path / "q.db", cfg) as q1, SqliteWorkQueue(tmp_path / "q.db", cfg) as q2, JsonlSink(
+        out
+    ) as s1, JsonlSink(out) as s2:
+        q1.enqueue(["https://books.test/"])
+        c1 = work(q1, fake_fetcher(pages), "w1", robots_for=lambda b: allow_all, sink=s1, delay_ms=0, max_pages=1)
+        c2 = work(q2, fake_fetcher(pages), "w2", robots_for=lambda b: allow_all, sink=s2, delay_ms=0)
+        assert q2.stats() == {DONE: 2}
+
+    assert c1["pages"] == 1 and c2["pages"] == 1
+    keys = [json.loads(line)["key"] for line in out.read_text().splitlines()]
+    assert keys == [
+        "https://books.test/catalogue/book-1/index.html",
+        "https://books.test/catalogue/book-2/index.html",
+    ]
+
+
+def test_dry_run_does_not_register_items(tmp_path, fake_fetcher, allow_all):
+    out = tmp_path / "items.jsonl"
+    with SqliteWorkQueue(tmp_path / "q.db", QueueConfig(default_delay_ms=0)) as q:
+        q.enqueue(["https://books.test/page-2.html"])
+        work(q, fake_fetcher({"https://books.test/page-2.html": PAGE_2}), "w1",
+             robots_for=lambda b: allow_all, sink=None, delay_ms=0, dry_run=True)
+        assert not out.exists()
+        assert q.unseen_items(["https://books.test/catalogue/book-2/index.html"])
+
+
+def test_items_are_released_when_write_fails(tmp_path, fake_fetcher, allow_all):
+    class BrokenSink:
+        def write(self, items):
+            raise OSError("disk full")
+
+    keys = ["https://books.test/catalogue/book-1/index.html", "https://books.test/catalogue/book-2/index.html"]
+    with SqliteWorkQueue(tmp_path / "q.db", QueueConfig(default_delay_ms=0)) as q:
+        q.record_items(keys[:1])
+        q.enqueue(["https://books.test/page-2.html"])
+        with pytest.raises(OSError):
+            work(q, fake_fetcher({"https://books.test/page-2.html": PAGE_2}), "w1",
+                 robots_for=lambda b: allow_all, sink=BrokenSink(), delay_ms=0)
+        assert q.unseen_items(keys) == {keys[1]}
+
+
+def test_page_is_skipped_when_lease_expired_during_fetch(tmp_path, fake_fetcher, allow_all):
+    out = tmp_path / "items.jsonl"
+    with SqliteWorkQueue(tmp_path / "q.db", QueueConfig(default_delay_ms=0, lease_s=0.05)) as q:
+        q.enqueue(["https://books.test/page-2.html"])
+        calls = []
+
+        class SlowOnceFetcher:
+            def get_text(self, url):
+                calls.append(url)
+                if len(calls) == 1:
+                    time.sleep(0.06)
+                    assert q.claim("other") is not None  # re-leases the expired page
+                return PAGE_2
+
+        with JsonlSink(out) as sink:
+            counts = work(q, SlowOnceFetcher(), "w1", robots_for=lambda b: allow_all, sink=sink, delay_ms=0, poll_s=0.02)
+        assert counts["lost"] == 1 and counts["pages"] == 1
+        assert len(out.read_text().splitlines()) == 2
+        assert q.stats() == {DONE: 1}
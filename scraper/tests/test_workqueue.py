@@ -0,0 +1,132 @@
+import time
+
+import pytest
+
+from scraper.workqueue import DONE, FAILED, LEASED, PENDING, QueueConfig, RedisWorkQueue, SqliteWorkQueue
+
+
+def _queue(tmp_path, **kw):
+    kw.setdefault("default_delay_ms", 0)
+    return SqliteWorkQueue(tmp_path / "frontier.db", QueueConfig(**kw))
+
+
+def test_enqueue_dedupes_urls(tmp_path):
+    with _queue(tmp_path) as q:
+        assert q.enqueue(["https://a.test/1", "https://a.test/2"]) == 2
+        assert q.enqueue(["https://a.test/1"]) == 0
+        assert q.stats() == {PENDING: 2}
+
+
+def test_claimed_url_is_invisible_to_other_workers(tmp_path):
+    with _queue(tmp_path) as q:
+        q.enqueue(["https://a.test/1"])
+        lease = q.claim("w1")
+        assert lease is not None and lease.url == "https://a.test/1"
+        assert q.claim("w2") is None
+        assert q.stats() == {LEASED: 1}
+        assert q.complete(lease) is True
+        assert q.stats() == {DONE: 1}
+        assert q.is_drained()
+
+
+def test_host_politeness_is_shared_across_connections(tmp_path):
+    with _queue(tmp_path, default_delay_ms=60_000) as q1, _queue(tmp_path, default_delay_ms=60_000) as q2:
+        q1.enqueue(["https://a.test/1", "https://a.test/2", "https://b.test/1"])
+        first = q1.claim("w1")
+        second = q2.claim("w2")
+        assert first.url == "https://a.test/1"
+        assert second.url == "https://b.test/1"
+        assert q2.claim("w2") is None
+
+
+def test_busy_host_backlog_does_not_block_other_hosts(tmp_path):
+    with _queue(tmp_path, default_delay_ms=60_000) as q:
+        q.enqueue([f"https://a.test/{i}" for i in range(500)])
+        assert q.claim("w1").url == "https://a.test/0"
+        q.enqueue(["https://b.test/1"])
+        assert q.claim("w2").url == "https://b.test/1"
+        assert q.claim("w3") is None
+        plan = " ".join(
+            str(r)
+            for r in q.conn.execute(
+                "EXPLAIN QUERY PLAN SELECT url FROM urls WHERE status = ? AND host = ? AND available_at <= ? "
+                "ORDER BY available_at LIMIT 1",
+                (PENDING, "a.test", time.time()),
+            )
+        )
+        assert "urls_status_host_available" in plan
+
+
+def test_expired_lease_is_requeued_and_old_token_rejected(tmp_path):
+    with _queue(tmp_path, lease_s=0.01) as q:
+        q.enqueue(["https://a.test/1"])
+        stale = q.claim("w1")
+        time.sleep(0.02)
+        fresh = q.claim("w2")
+        assert fresh is not None and fresh.url == stale.url
+        assert fresh.attempts == 2
+        assert q.complete(stale) is False
+        assert q.complete(fresh) is True
+
+
+def test_expired_lease_counts_towards_max_attempts(tmp_path):
+    with _queue(tmp_path, lease_s=0.01, max_attempts=2) as q:
+        q.enqueue(["https://a.test/1"])
+        q.claim("w1")
+        time.sleep(0.02)
+        assert q.claim("w2") is not None
+        time.sleep(0.02)
+        assert q.claim("w3") is None
+        assert q.stats() == {FAILED: 1}
+
+
+def test_fail_retries_then_gives_up(tmp_path):
+    with _queue(tmp_path, max_attempts=2, retry_delay_s=0) as q:
+        q.enqueue(["https://a.test/1"])
+        q.fail(q.claim("w1"), "boom")
+        assert q.stats() == {PENDING: 1}
+        q.fail(q.claim("w1"), "boom")
+        assert q.stats() == {FAILED: 1}
+
+
+def test_record_items_returns_only_new_keys(tmp_path):
+    with _queue(tmp_path) as q:
+        assert q.unseen_items(["k1", "k2"]) == {"k1", "k2"}
+        assert q.record_items(["k1", "k2"]) == {"k1", "k2"}
+        assert q.unseen_items(["k2", "k3"]) == {"k3"}
+        assert q.record_items(["k2", "k3"]) == {"k3"}
+        q.forget_items(["k3"])
+        assert q.unseen_items(["k2", "k3"]) == {"k3"}
+
+
+def test_redis_queue_leases_and_host_politeness():
+    fakeredis = pytest.importorskip("fakeredis")
+    q = RedisWorkQueue(fakeredis.FakeRedis(), config=QueueConfig(default_delay_ms=60_000))
+    q.enqueue(["https://a.test/1", "https://a.test/2", "https://b.test/1"])
+    first, second = q.claim("w1"), q.claim("w2")
+    assert {first.url, second.url} == {"https://a.test/1", "https://b.test/1"}
+    assert q.claim("w3") is None
+    assert q.complete(first) is True
+    assert q.stats() == {DONE: 1, LEASED: 1, PENDING: 1}
+
+
+def test_redis_busy_host_does_not_starve_others():
+    fakeredis = pytest.importorskip("fakeredis")
+    q = RedisWorkQueue(fakeredis.FakeRedis(), config=QueueConfig(default_delay_ms=60_000))
+    q.enqueue([f"https://a.test/{i}" for i in range(60)])
+    q.enqueue(["https://b.test/1"])
+    assert q.claim("w1").url == "https://a.test/0"
+    assert q.claim("w2").url == "https://b.test/1"
+    assert q.claim("w3") is None
+
+
+def test_redis_expired_lease_counts_towards_max_attempts():
+    fakeredis = pytest.importorskip("fakeredis")
+    q = RedisWorkQueue(fakeredis.FakeRedis(), config=QueueConfig(default_delay_ms=0, lease_s=0.01, max_attempts=2))
+    q.enqueue(["https://a.test/1"])
+    q.claim("w1")
+    time.sleep(0.02)
+    assert q.claim("w2") is not None
+    time.sleep(0.02)
+    assert q.claim("w3") is None
+    assert q.stats() == {FAILED: 1}
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import socket
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Optional
+
+from .fetcher import Fetcher, FetcherConfig
+from .pagination import site_root
+from .parser import parse_books_list
+from .robots import RobotsHandler
+from .sinks import JsonlSink, Sink
+from .workqueue import QueueConfig, WorkQueue, host_of, open_queue
+
+logger = logging.getLogger(__name__)
+
+
+def work(
+    queue: WorkQueue,
+    fetcher: Fetcher,
+    worker_id: str,
+    *,
+    robots_for: Callable[[str], RobotsHandler],
+    sink: Optional[Sink],
+    delay_ms: int = 800,
+    dry_run: bool = False,
+    max_pages: Optional[int] = None,
+    poll_s: float = 0.5,
+) -> dict[str, int]:
+    """
+    Claims and processes pages until the queue drains or ``max_pages`` is hit.
+
+    ``robots_for`` maps a site root to its robots handler; the first time a
+    host is seen its effective delay is published to the queue so every
+    worker paces that host the same way. ``sink`` may be None for dry runs.
+
+    Item keys are claimed in the queue before they are written, so two
+    workers parsing overlapping pages never both write the same key. If the
+    write fails, the keys are released again.
+    """
+    robots_cache: dict[str, RobotsHandler] = {}
+    counts = {"pages": 0, "items": 0, "failed": 0, "lost": 0}
+
+    while max_pages is None or counts["pages"] < max_pages:
+        lease = queue.claim(worker_id)
+        if lease is None:
+            if queue.is_drained():
+                break
+            time.sleep(poll_s)
+            continue
+
+        url = lease.url
+        base_url = site_root(url)
+        robots = robots_cache.get(base_url)
+        if robots is None:
+            robots = robots_cache[base_url] = robots_for(base_url)
+            queue.set_host_delay(host_of(url), max(delay_ms, robots.get_crawl_delay_ms()))
+
+        if not robots.can_fetch(url):
+            queue.fail(lease, "disallowed by robots.txt", retry=False)
+            counts["failed"] += 1
+            continue
+
+        try:
+            html = fetcher.get_text(url)
+        except Exception as e:
+            queue.fail(lease, f"{type(e).__name__}: {e}")
+            counts["failed"] += 1
+            continue
+
+        items, next_url = parse_books_list(html, base_url=base_url, page_url=url)
+        # A slow fetch can outlive the lease; if another worker has the page
+        # by now, leave the write to it.
+        if not queue.extend(lease):
+            logger.warning("[worker] Lease on %s expired during fetch; skipping", url)
+            counts["lost"] += 1
+            continue
+
+        keys = [it["key"] for it in items]
+        if dry_run or sink is None:
+            new_keys = queue.unseen_items(keys)
+            logger.info(
+                "[worker] [dry-run] Page %s → parsed=%d, new=%d, next=%s",
+                url,
+                len(items),
+                len(new_keys),
+                next_url,
+            )
+        else:
+            new_keys = queue.record_items(keys)
+            try:
+                counts["items"] += sink.write([it for it in items if it["key"] in new_keys])
+            except Exception:
+                queue.forget_items(new_keys)
+                raise
+
+        if next_url:
+            queue.enqueue([next_url])
+        if not queue.complete(lease):
+            counts["lost"] += 1
+        counts["pages"] += 1
+
+    return counts
+
+
+def run() -> int:
+    parser = argparse.ArgumentParser(
+        description="Crawl worker pulling pages from a shared work queue"
+    )
+    parser.add_argument(
+        "--queue",
+        type=str,
+        default=str(Path(__file__).resolve().parent / "data" / "frontier.db"),
+        help="Queue spec: a SQLite path on shared storage, or a redis:// URL.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=str,
+        action="append",
+        default=[],
+        help="URL to add to the frontier before working (repeatable, idempotent).",
+    )
+    parser.add_argument(
+        "--worker-id",
+        type=str,
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Identifier recorded on leases and used in the output file name.",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=None,
+        help="Stop this worker after processing this many pages.",
+    )
+    parser.add_argument(
+        "--delay-ms",
+        type=int,
+        default=800,
+        help="Minimum per-host gap between requests across all workers.",
+    )
+    parser.add_argument(
+        "--lease-s",
+        type=float,
+        default=60.0,
+        help="Visibility timeout before an unfinished page is handed out again.",
+    )
+    parser.add_argument(
+        "--user-agent",
+        type=str,
+        default="book-scraper/0.1 (+yourname)",
+        help="Custom User-Agent string.",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        default=None,
+        help="Output JSONL path (default: data/items.<worker-id>.jsonl).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Process pages without writing items.",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    log = logging.getLogger("scraper.worker")
+
+    data_path = (
+        Path(args.out)
+        if args.out
+        else Path(__file__).resolve().parent / "data" / f"items.{args.worker_id}.jsonl"
+    )
+    qcfg = QueueConfig(lease_s=args.lease_s, default_delay_ms=args.delay_ms)
+    # Pacing is enforced by the queue's host reservations, not per process,
+    # and retries go back through the queue so they wait out retry_delay_s
+    # and the host's reservation instead of hitting the host again at once.
+    cfg = FetcherConfig(user_agent=args.user_agent, base_delay_ms=0, max_retries=1)
+
+    try:
+        with open_queue(args.queue, qcfg) as queue, Fetcher(cfg) as fetcher, (
+            nullcontext() if args.dry_run else JsonlSink(data_path)
+        ) as sink:
+            if args.seed:
+                queue.enqueue(args.seed)
+            counts = work(
+                queue,
+                fetcher,
+                args.worker_id,
+                robots_for=lambda base: RobotsHandler(base_url=base, user_agent=args.user_agent),
+                sink=sink,
+                delay_ms=args.delay_ms,
+                dry_run=args.dry_run,
+                max_pages=args.max_pages,
+            )
+            log.info(
+                "Worker %s done: pages=%d, items=%d, failed=%d, lost leases=%d, queue=%s",
+                args.worker_id,
+                counts["pages"],
+                counts["items"],
+                counts["failed"],
+                counts["lost"],
+                queue.stats(),
+            )
+        return 0
+    except KeyboardInterrupt:
+        log.warning("Interrupted by user. Leased pages will be re-queued on expiry.")
+        return 130
+    except Exception as e:
+        log.exception("Fatal error: %s", e)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(run())
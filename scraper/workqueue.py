@@ -0,0 +1,547 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+@dataclass
+class QueueConfig:
+    lease_s: float = 60.0
+    default_delay_ms: int = 800
+    max_attempts: int = 3
+    retry_delay_s: float = 5.0
+
+
+@dataclass
+class Lease:
+    url: str
+    token: str
+    worker_id: str
+    attempts: int
+    expires_at: float
+
+
+class WorkQueue(ABC):
+    """
+    Shared crawl frontier with leases and visibility timeouts.
+
+    A claimed URL is invisible to other workers until its lease expires, at
+    which point it is handed out again. Claims also reserve the URL's host
+    for its politeness delay, so per-host pacing holds across all workers.
+    """
+
+    def __init__(self, config: Optional[QueueConfig] = None):
+        self.config = config or QueueConfig()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def enqueue(self, urls: Iterable[str]) -> int:
+        """Adds URLs not seen before. Returns how many were new."""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Lease]:
+        """Leases the next URL whose host is ready, or returns None."""
+
+    @abstractmethod
+    def extend(self, lease: Lease) -> bool:
+        """Pushes the lease expiry forward. False if the lease was lost."""
+
+    @abstractmethod
+    def complete(self, lease: Lease) -> bool:
+        """Marks the URL done. False if the lease was lost."""
+
+    @abstractmethod
+    def fail(self, lease: Lease, error: str, retry: bool = True) -> bool:
+        """Re-queues the URL after a delay, or marks it failed for good."""
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """Returns expired leases to the pending set. Returns the count."""
+
+    @abstractmethod
+    def set_host_delay(self, host: str, delay_ms: int) -> None:
+        """Sets the minimum gap between claims for one host."""
+
+    @abstractmethod
+    def unseen_items(self, keys: Iterable[str]) -> set[str]:
+        """Returns the keys not registered yet, without registering them."""
+
+    @abstractmethod
+    def record_items(self, keys: Iterable[str]) -> set[str]:
+        """Registers item keys globally. Returns the keys not seen before."""
+
+    @abstractmethod
+    def forget_items(self, keys: Iterable[str]) -> None:
+        """Unregisters item keys, e.g. after the write they were claimed for failed."""
+
+    @abstractmethod
+    def stats(self) -> dict[str, int]:
+        """Returns URL counts by status."""
+
+    def is_drained(self) -> bool:
+        s = self.stats()
+        return s.get(PENDING, 0) == 0 and s.get(LEASED, 0) == 0
+
+
+class SqliteWorkQueue(WorkQueue):
+    """
+    Work queue stored in a single SQLite file.
+
+    Uses the rollback journal rather than WAL so the file can live on shared
+    storage; every claim runs in a ``BEGIN IMMEDIATE`` transaction.
+
+    Every host with queued URLs has a row in ``hosts``. A claim picks the
+    host that has waited longest past its politeness delay and still has a
+    URL available, then takes that host's earliest URL through the
+    ``(status, host, available_at)`` index. Its cost grows with the number
+    of hosts, not with the backlog on a busy host.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS urls (
+        url TEXT PRIMARY KEY,
+        host TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        available_at REAL NOT NULL,
+        lease_token TEXT,
+        lease_owner TEXT,
+        lease_expires REAL,
+        last_error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS urls_status_host_available ON urls(status, host, available_at);
+    CREATE TABLE IF NOT EXISTS hosts (
+        host TEXT PRIMARY KEY,
+        delay_ms INTEGER NOT NULL,
+        next_at REAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS hosts_next_at ON hosts(next_at);
+    CREATE TABLE IF NOT EXISTS items (
+        key TEXT PRIMARY KEY
+    );
+    """
+
+    def __init__(self, path: str | Path, config: Optional[QueueConfig] = None):
+        super().__init__(config)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        self.conn.executescript(self._SCHEMA)
+        # Frontiers created before hosts were tracked on enqueue.
+        self.conn.execute(
+            """
+            INSERT OR IGNORE INTO hosts (host, delay_ms)
+            SELECT DISTINCT host, ? FROM urls WHERE status IN (?, ?)
+            """,
+            (self.config.default_delay_ms, PENDING, LEASED),
+        )
+
+    def close(self) -> None:
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+    def _begin(self) -> None:
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, urls: Iterable[str]) -> int:
+        now = time.time()
+        rows = [(u, host_of(u), PENDING, now) for u in urls]
+        self._begin()
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO urls (url, host, status, available_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            added = self.conn.total_changes - before
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO hosts (host, delay_ms) VALUES (?, ?)",
+                [(h, self.config.default_delay_ms) for h in dict.fromkeys(r[1] for r in rows)],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        if added:
+            logger.info("[queue] Enqueued %d new URLs", added)
+        return added
+
+    def claim(self, worker_id: str) -> Optional[Lease]:
+        now = time.time()
+        self._begin()
+        try:
+            self._requeue_expired_locked(now)
+            host_row = self.conn.execute(
+                """
+                SELECT h.host FROM hosts h
+                WHERE h.next_at <= ? AND EXISTS (
+                    SELECT 1 FROM urls u WHERE u.status = ? AND u.host = h.host AND u.available_at <= ?
+                )
+                ORDER BY h.next_at, h.rowid
+                LIMIT 1
+                """,
+                (now, PENDING, now),
+            ).fetchone()
+            row = host_row and self.conn.execute(
+                """
+                SELECT url, host, attempts FROM urls
+                WHERE status = ? AND host = ? AND available_at <= ?
+                ORDER BY available_at
+                LIMIT 1
+                """,
+                (PENDING, host_row[0], now),
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+
+            url, host, attempts = row
+            token = uuid.uuid4().hex
+            expires_at = now + self.config.lease_s
+            self.conn.execute(
+                """
+                UPDATE urls SET status = ?, attempts = attempts + 1, lease_token = ?,
+                    lease_owner = ?, lease_expires = ?
+                WHERE url = ?
+                """,
+                (LEASED, token, worker_id, expires_at, url),
+            )
+            self.conn.execute(
+                """
+                INSERT INTO hosts (host, delay_ms, next_at) VALUES (?, ?, ? + ? / 1000.0)
+                ON CONFLICT(host) DO UPDATE SET next_at = ? + hosts.delay_ms / 1000.0
+                """,
+                (host, self.config.default_delay_ms, now, self.config.default_delay_ms, now),
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        logger.debug("[queue] %s claimed %s", worker_id, url)
+        return Lease(url=url, token=token, worker_id=worker_id, attempts=attempts + 1, expires_at=expires_at)
+
+    def extend(self, lease: Lease) -> bool:
+        expires_at = time.time() + self.config.lease_s
+        cur = self.conn.execute(
+            "UPDATE urls SET lease_expires = ? WHERE url = ? AND status = ? AND lease_token = ?",
+            (expires_at, lease.url, LEASED, lease.token),
+        )
+        if cur.rowcount:
+            lease.expires_at = expires_at
+        return cur.rowcount == 1
+
+    def complete(self, lease: Lease) -> bool:
+        cur = self.conn.execute(
+            """
+            UPDATE urls SET status = ?, lease_token = NULL, lease_expires = NULL
+            WHERE url = ? AND status = ? AND lease_token = ?
+            """,
+            (DONE, lease.url, LEASED, lease.token),
+        )
+        if cur.rowcount != 1:
+            logger.warning("[queue] Lease lost before completing %s", lease.url)
+        return cur.rowcount == 1
+
+    def fail(self, lease: Lease, error: str, retry: bool = True) -> bool:
+        give_up = not retry or lease.attempts >= self.config.max_attempts
+        status = FAILED if give_up else PENDING
+        cur = self.conn.execute(
+            """
+            UPDATE urls SET status = ?, available_at = ?, last_error = ?,
+                lease_token = NULL, lease_expires = NULL
+            WHERE url = ? AND status = ? AND lease_token = ?
+            """,
+            (status, time.time() + self.config.retry_delay_s, error, lease.url, LEASED, lease.token),
+        )
+        if cur.rowcount == 1:
+            logger.warning("[queue] %s %s: %s", "Gave up on" if give_up else "Re-queued", lease.url, error)
+        return cur.rowcount == 1
+
+    def _requeue_expired_locked(self, now: float) -> int:
+        failed = self.conn.execute(
+            """
+            UPDATE urls SET status = ?, last_error = ?, lease_token = NULL, lease_expires = NULL
+            WHERE status = ? AND lease_expires < ? AND attempts >= ?
+            """,
+            (FAILED, "lease expired", LEASED, now, self.config.max_attempts),
+        ).rowcount
+        if failed:
+            logger.warning("[queue] Gave up on %d URLs whose leases expired %d times", failed, self.config.max_attempts)
+        cur = self.conn.execute(
+            """
+            UPDATE urls SET status = ?, lease_token = NULL, lease_expires = NULL
+            WHERE status = ? AND lease_expires < ?
+            """,
+            (PENDING, LEASED, now),
+        )
+        if cur.rowcount:
+            logger.info("[queue] Re-queued %d expired leases", cur.rowcount)
+        return cur.rowcount
+
+    def requeue_expired(self) -> int:
+        self._begin()
+        try:
+            n = self._requeue_expired_locked(time.time())
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return n
+
+    def set_host_delay(self, host: str, delay_ms: int) -> None:
+        self.conn.execute(
+            """
+            INSERT INTO hosts (host, delay_ms) VALUES (?, ?)
+            ON CONFLICT(host) DO UPDATE SET delay_ms = excluded.delay_ms
+            """,
+            (host, delay_ms),
+        )
+
+    def unseen_items(self, keys: Iterable[str]) -> set[str]:
+        unseen: set[str] = set()
+        for k in keys:
+            if self.conn.execute("SELECT 1 FROM items WHERE key = ?", (k,)).fetchone() is None:
+                unseen.add(k)
+        return unseen
+
+    def record_items(self, keys: Iterable[str]) -> set[str]:
+        new: set[str] = set()
+        self._begin()
+        try:
+            for k in keys:
+                cur = self.conn.execute("INSERT OR IGNORE INTO items (key) VALUES (?)", (k,))
+                if cur.rowcount:
+                    new.add(k)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return new
+
+    def forget_items(self, keys: Iterable[str]) -> None:
+        self.conn.executemany("DELETE FROM items WHERE key = ?", [(k,) for k in keys])
+
+    def stats(self) -> dict[str, int]:
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    Work queue backed by a Redis-compatible server.
+
+    Takes any client exposing the redis-py command API, so a local stand-in
+    such as fakeredis or a Redis-protocol server can be plugged in. Host
+    politeness uses ``SET NX PX`` keys that expire after the host's delay.
+
+    Pending URLs live in one sorted set per host, and a ``hosts`` sorted set
+    scores each host by when it can next be claimed. A host found busy is
+    re-scored to the end of its delay, so claims only ever scan hosts that
+    are ready and one busy host cannot starve the rest.
+    """
+
+    def __init__(self, client: Any, prefix: str = "scraper", config: Optional[QueueConfig] = None):
+        super().__init__(config)
+        self.r = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "scraper", config: Optional[QueueConfig] = None) -> "RedisWorkQueue":
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisWorkQueue requires the 'redis' package (pip install redis)") from e
+        return cls(redis.Redis.from_url(url), prefix=prefix, config=config)
+
+    def close(self) -> None:
+        try:
+            self.r.close()
+        except Exception:
+            pass
+
+    def _k(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def _state(self, url: str) -> Optional[dict]:
+        raw = self.r.hget(self._k("urls"), url)
+        return json.loads(raw) if raw else None
+
+    def _set_state(self, url: str, state: dict) -> None:
+        self.r.hset(self._k("urls"), url, json.dumps(state))
+
+    def _push(self, url: str, available_at: float) -> None:
+        host = host_of(url)
+        self.r.zadd(self._k(f"pending:{host}"), {url: available_at})
+        self.r.zadd(self._k("hosts"), {host: available_at}, lt=True)
+
+    def _reschedule_host(self, host: str, not_before: float = 0.0) -> None:
+        first = self.r.zrange(self._k(f"pending:{host}"), 0, 0, withscores=True)
+        if not first:
+            self.r.zrem(self._k("hosts"), host)
+        else:
+            self.r.zadd(self._k("hosts"), {host: max(first[0][1], not_before)})
+
+    def enqueue(self, urls: Iterable[str]) -> int:
+        now = time.time()
+        added = 0
+        for u in urls:
+            state = {"status": PENDING, "attempts": 0, "token": None, "error": None}
+            if self.r.hsetnx(self._k("urls"), u, json.dumps(state)):
+                self._push(u, now)
+                added += 1
+        if added:
+            logger.info("[queue] Enqueued %d new URLs", added)
+        return added
+
+    def claim(self, worker_id: str) -> Optional[Lease]:
+        self.requeue_expired()
+        now = time.time()
+        for raw_host in self.r.zrangebyscore(self._k("hosts"), "-inf", now, start=0, num=50):
+            host = raw_host.decode() if isinstance(raw_host, bytes) else raw_host
+            host_key = self._k(f"host:{host}")
+            delay_ms = int(self.r.hget(self._k("hostdelay"), host) or self.config.default_delay_ms)
+            if delay_ms > 0 and not self.r.set(host_key, worker_id, nx=True, px=delay_ms):
+                ttl_ms = max(int(self.r.pttl(host_key)), 0)
+                self._reschedule_host(host, not_before=now + ttl_ms / 1000.0)
+                continue
+
+            url = None
+            for raw_url in self.r.zrangebyscore(self._k(f"pending:{host}"), "-inf", now, start=0, num=1):
+                candidate = raw_url.decode() if isinstance(raw_url, bytes) else raw_url
+                if self.r.zrem(self._k(f"pending:{host}"), candidate):
+                    url = candidate
+            self._reschedule_host(host, not_before=now + delay_ms / 1000.0 if url else 0.0)
+            if url is None:
+                if delay_ms > 0:
+                    self.r.delete(host_key)
+                continue
+
+            state = self._state(url) or {"attempts": 0}
+            token = uuid.uuid4().hex
+            expires_at = now + self.config.lease_s
+            state.update(status=LEASED, attempts=state.get("attempts", 0) + 1, token=token)
+            self._set_state(url, state)
+            self.r.zadd(self._k("leases"), {url: expires_at})
+            logger.debug("[queue] %s claimed %s", worker_id, url)
+            return Lease(url=url, token=token, worker_id=worker_id, attempts=state["attempts"], expires_at=expires_at)
+        return None
+
+    def _owns(self, lease: Lease) -> Optional[dict]:
+        state = self._state(lease.url)
+        if state and state.get("status") == LEASED and state.get("token") == lease.token:
+            return state
+        return None
+
+    def extend(self, lease: Lease) -> bool:
+        if self._owns(lease) is None:
+            return False
+        lease.expires_at = time.time() + self.config.lease_s
+        self.r.zadd(self._k("leases"), {lease.url: lease.expires_at})
+        return True
+
+    def complete(self, lease: Lease) -> bool:
+        state = self._owns(lease)
+        if state is None:
+            logger.warning("[queue] Lease lost before completing %s", lease.url)
+            return False
+        self.r.zrem(self._k("leases"), lease.url)
+        state.update(status=DONE, token=None)
+        self._set_state(lease.url, state)
+        return True
+
+    def fail(self, lease: Lease, error: str, retry: bool = True) -> bool:
+        state = self._owns(lease)
+        if state is None:
+            return False
+        give_up = not retry or lease.attempts >= self.config.max_attempts
+        self.r.zrem(self._k("leases"), lease.url)
+        state.update(status=FAILED if give_up else PENDING, token=None, error=error)
+        self._set_state(lease.url, state)
+        if not give_up:
+            self._push(lease.url, time.time() + self.config.retry_delay_s)
+        logger.warning("[queue] %s %s: %s", "Gave up on" if give_up else "Re-queued", lease.url, error)
+        return True
+
+    def requeue_expired(self) -> int:
+        now = time.time()
+        n = 0
+        for raw_url in self.r.zrangebyscore(self._k("leases"), "-inf", now):
+            url = raw_url.decode() if isinstance(raw_url, bytes) else raw_url
+            if not self.r.zrem(self._k("leases"), url):
+                continue
+            state = self._state(url) or {"attempts": 0}
+            if state.get("attempts", 0) >= self.config.max_attempts:
+                state.update(status=FAILED, token=None, error="lease expired")
+                self._set_state(url, state)
+                logger.warning("[queue] Gave up on %s: lease expired %d times", url, state["attempts"])
+                continue
+            state.update(status=PENDING, token=None)
+            self._set_state(url, state)
+            self._push(url, now)
+            n += 1
+        if n:
+            logger.info("[queue] Re-queued %d expired leases", n)
+        return n
+
+    def set_host_delay(self, host: str, delay_ms: int) -> None:
+        self.r.hset(self._k("hostdelay"), host, delay_ms)
+
+    def unseen_items(self, keys: Iterable[str]) -> set[str]:
+        return {k for k in keys if not self.r.sismember(self._k("items"), k)}
+
+    def record_items(self, keys: Iterable[str]) -> set[str]:
+        return {k for k in keys if self.r.sadd(self._k("items"), k)}
+
+    def forget_items(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if keys:
+            self.r.srem(self._k("items"), *keys)
+
+    def stats(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for raw in self.r.hvals(self._k("urls")):
+            status = json.loads(raw)["status"]
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+
+def open_queue(spec: str, config: Optional[QueueConfig] = None) -> WorkQueue:
+    """
+    Opens a queue from a spec: ``redis://...`` for Redis, anything else
+    (optionally prefixed with ``sqlite:///``) as a SQLite file path.
+    """
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisWorkQueue.from_url(spec, config=config)
+    if spec.startswith("sqlite:///"):
+        spec = spec[len("sqlite:///"):]
+    return SqliteWorkQueue(spec, config=config)
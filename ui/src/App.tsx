@@ -27,25 +27,40 @@ export default function App() {
   const [chartMode, setChartMode] = React.useState<"category" | "rating">("category")
   const [selected, setSelected] = React.useState<BookItem | null>(null)
 
-  React.useEffect(() => {
-    loadItems()
+  const [streaming, setStreaming] = React.useState(false)
+  const loadAbort = React.useRef<AbortController | null>(null)
+
+  const startLoad = React.useCallback((forceRefresh: boolean) => {
+    loadAbort.current?.abort()
+    const ctrl = new AbortController()
+    loadAbort.current = ctrl
+    setStreaming(true)
+
+    loadItems({ forceRefresh, onBatch: setItems, signal: ctrl.signal })
       .then((data) => {
         setItems(data)
         setError(null)
+        setStreaming(false)
       })
-      .catch((e) => setError(String(e)))
+      .catch((e) => {
+        if (ctrl.signal.aborted) return
+        setError(String(e))
+        setStreaming(false)
+      })
+    return ctrl
   }, [])
 
+  React.useEffect(() => {
+    const ctrl = startLoad(false)
+    return () => ctrl.abort()
+  }, [startLoad])
+
   const onRefresh = React.useCallback(() => {
-    clearItemsCache()
-    loadItems({ forceRefresh: true })
-      .then((data) => {
-        setItems(data)
-        setError(null)
-        setPage(1)
-      })
-      .catch((e) => setError(String(e)))
-  }, [])
+    clearItemsCache().then(() => {
+      setPage(1)
+      startLoad(true)
+    })
+  }, [startLoad])
 
   const clearFilters = React.useCallback(() => {
     setSearch("")
@@ -108,8 +123,11 @@ export default function App() {
         <div>
           <h1 className="text-2xl font-bold">Books Explorer</h1>
           <p className="text-gray-600">
-            Data loaded from <code>/items.jsonl</code> (cached locally for faster reloads)
+            Data streamed from <code>/items.jsonl</code> (cached in IndexedDB for faster reloads)
           </p>
+          {streaming && items !== null && (
+            <p className="text-sm text-gray-500">Loading… {items.length.toLocaleString()} rows so far</p>
+          )}
         </div>
       </header>
 
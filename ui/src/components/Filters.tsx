@@ -97,7 +97,7 @@ export default function Filters({
         value={pageSize}
         onChange={(e) => setPageSize(Number(e.target.value))}
       >
-        {[10, 20, 50, 100].map((n) => (
+        {[10, 20, 50, 100, 500, 1000].map((n) => (
           <option key={n} value={n}>
             {n} / page
           </option>
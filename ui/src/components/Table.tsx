@@ -1,5 +1,13 @@
+import React from "react"
+
 import type { BookItem } from "../lib/loadData"
 
+// Rows have a fixed height so the visible window can be computed from
+// scrollTop alone; cells truncate instead of wrapping to keep it fixed.
+const ROW_HEIGHT = 45
+const VIEWPORT_HEIGHT = 600
+const OVERSCAN = 10
+
 type Props = {
   rows: BookItem[]
   onRowClick?: (item: BookItem) => void
@@ -20,8 +28,30 @@ function ratingClass(r: number): string {
 }
 
 export default function Table({ rows, onRowClick, onClearFilters }: Props) {
+  const [scrollTop, setScrollTop] = React.useState(0)
+  const viewport = React.useRef<HTMLDivElement>(null)
+
+  // A new row set (page, filter or sort change) starts at the top; otherwise
+  // the old offset can point past the end and render an empty window.
+  // Rows appended while streaming keep the first key, so scrolling survives.
+  const firstKey = rows[0]?.key
+  React.useLayoutEffect(() => {
+    if (viewport.current) viewport.current.scrollTop = 0
+    setScrollTop(0)
+  }, [firstKey])
+
+  const first = Math.max(0, Math.floor(scrollTop / ROW_HEIGHT) - OVERSCAN)
+  const last = Math.min(rows.length, Math.ceil((scrollTop + VIEWPORT_HEIGHT) / ROW_HEIGHT) + OVERSCAN)
+  const visible = rows.slice(first, last)
+  const cell: React.CSSProperties = { whiteSpace: "nowrap", overflow: "hidden", textOverflow: "ellipsis" }
+
   return (
-    <div className="overflow-x-auto rounded-xl border border-gray-200 bg-white shadow-sm">
+    <div
+      ref={viewport}
+      className="overflow-auto rounded-xl border border-gray-200 bg-white shadow-sm"
+      style={{ maxHeight: VIEWPORT_HEIGHT }}
+      onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}
+    >
       <table className="min-w-full text-sm text-gray-800">
         <thead className="sticky top-0 z-10 bg-gray-50 text-left font-semibold shadow-sm">
           <tr>
@@ -34,24 +64,32 @@ export default function Table({ rows, onRowClick, onClearFilters }: Props) {
           </tr>
         </thead>
         <tbody>
-          {rows.map((r) => (
+          {first > 0 && <tr aria-hidden style={{ height: first * ROW_HEIGHT }} />}
+          {visible.map((r) => (
             <tr
               key={r.key}
               className="cursor-pointer border-t border-gray-200 hover:bg-gray-100"
+              style={{ height: ROW_HEIGHT }}
               onClick={() => onRowClick?.(r)}
             >
-              <td className="p-3">{r.title}</td>
-              <td className="p-3">{r.category || "—"}</td>
-              <td className="p-3">
+              <td className="p-3" style={{ ...cell, maxWidth: "24rem" }} title={r.title}>
+                {r.title}
+              </td>
+              <td className="p-3" style={cell}>
+                {r.category || "—"}
+              </td>
+              <td className="p-3" style={cell}>
                 <Price value={r.price} />
               </td>
-              <td className="p-3">
+              <td className="p-3" style={cell}>
                 <span className={`inline-flex items-center rounded px-2 py-0.5 ${ratingClass(r.rating)}`}>
                   {r.rating ? `${r.rating}★` : "—"}
                 </span>
               </td>
-              <td className="p-3">{r.availability}</td>
-              <td className="p-3">
+              <td className="p-3" style={cell}>
+                {r.availability}
+              </td>
+              <td className="p-3" style={cell}>
                 <a
                   href={r.url}
                   target="_blank"
@@ -64,6 +102,7 @@ export default function Table({ rows, onRowClick, onClearFilters }: Props) {
               </td>
             </tr>
           ))}
+          {last < rows.length && <tr aria-hidden style={{ height: (rows.length - last) * ROW_HEIGHT }} />}
           {rows.length === 0 && (
             <tr>
               <td className="p-6 text-gray-500" colSpan={6}>
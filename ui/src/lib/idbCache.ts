@@ -0,0 +1,106 @@
+import type { BookItem } from "./loadData"
+
+const DB_NAME = "books-explorer"
+const DB_VERSION = 1
+const ITEMS_STORE = "items"
+const META_STORE = "meta"
+const COMPLETE_KEY = "complete"
+
+type CachedRow = { seq: number; item: BookItem }
+
+function openDb(): Promise<IDBDatabase> {
+  return new Promise((resolve, reject) => {
+    const req = indexedDB.open(DB_NAME, DB_VERSION)
+    req.onupgradeneeded = () => {
+      const db = req.result
+      if (!db.objectStoreNames.contains(ITEMS_STORE)) db.createObjectStore(ITEMS_STORE, { keyPath: "seq" })
+      if (!db.objectStoreNames.contains(META_STORE)) db.createObjectStore(META_STORE)
+    }
+    req.onsuccess = () => resolve(req.result)
+    req.onerror = () => reject(req.error)
+  })
+}
+
+function done(tx: IDBTransaction): Promise<void> {
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve()
+    tx.onerror = () => reject(tx.error)
+    tx.onabort = () => reject(tx.error)
+  })
+}
+
+function request<T>(req: IDBRequest<T>): Promise<T> {
+  return new Promise((resolve, reject) => {
+    req.onsuccess = () => resolve(req.result)
+    req.onerror = () => reject(req.error)
+  })
+}
+
+/**
+ * Streams cached rows in insertion order, `pageSize` at a time.
+ * Returns false without calling `onPage` if no complete snapshot is cached.
+ */
+export async function readCachedItems(onPage: (rows: BookItem[]) => void, pageSize = 10000): Promise<boolean> {
+  const db = await openDb()
+  try {
+    const meta = await request(db.transaction(META_STORE).objectStore(META_STORE).get(COMPLETE_KEY))
+    if (!meta) return false
+
+    let next = 0
+    for (;;) {
+      const store = db.transaction(ITEMS_STORE).objectStore(ITEMS_STORE)
+      const rows = (await request(store.getAll(IDBKeyRange.lowerBound(next), pageSize))) as CachedRow[]
+      if (rows.length === 0) break
+      onPage(rows.map((r) => r.item))
+      next = rows[rows.length - 1].seq + 1
+    }
+    return true
+  } finally {
+    db.close()
+  }
+}
+
+/**
+ * Incremental writer: `begin` drops the old snapshot, `append` stores a batch,
+ * `finish` marks the snapshot complete so partial loads are never read back.
+ */
+export async function openCacheWriter() {
+  const db = await openDb()
+  let seq = 0
+
+  const begin = async () => {
+    const tx = db.transaction([ITEMS_STORE, META_STORE], "readwrite")
+    tx.objectStore(META_STORE).delete(COMPLETE_KEY)
+    tx.objectStore(ITEMS_STORE).clear()
+    await done(tx)
+  }
+
+  const append = async (rows: BookItem[]) => {
+    const tx = db.transaction(ITEMS_STORE, "readwrite")
+    const store = tx.objectStore(ITEMS_STORE)
+    for (const item of rows) store.put({ seq: seq++, item } satisfies CachedRow)
+    await done(tx)
+  }
+
+  const finish = async () => {
+    const tx = db.transaction(META_STORE, "readwrite")
+    tx.objectStore(META_STORE).put({ ts: Date.now(), total: seq }, COMPLETE_KEY)
+    await done(tx)
+    db.close()
+  }
+
+  await begin()
+  return { append, finish, close: () => db.close() }
+}
+
+export async function clearCachedItems(): Promise<void> {
+  const db = await openDb()
+  try {
+    const tx = db.transaction([ITEMS_STORE, META_STORE], "readwrite")
+    tx.objectStore(META_STORE).clear()
+    tx.objectStore(ITEMS_STORE).clear()
+    await done(tx)
+  } finally {
+    db.close()
+  }
+}
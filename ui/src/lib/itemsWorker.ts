@@ -0,0 +1,101 @@
+import { openCacheWriter, readCachedItems } from "./idbCache"
+import type { BookItem, WorkerMessage, WorkerRequest } from "./loadData"
+
+const FIRST_BATCH = 100
+const MAX_BATCH = 5000
+
+const post = (msg: WorkerMessage) => self.postMessage(msg)
+
+function parseLine(raw: string): BookItem | null {
+  const line = raw.trim()
+  if (!line) return null
+  try {
+    return JSON.parse(line) as BookItem
+  } catch {
+    return null // ignore malformed lines
+  }
+}
+
+async function loadFromNetwork(force: boolean): Promise<number> {
+  const res = await fetch("/items.jsonl", { cache: force ? "reload" : "default" })
+  if (!res.ok) throw new Error(`Failed to load items.jsonl: ${res.status}`)
+
+  const cache = await openCacheWriter().catch(() => null)
+  let pendingWrite: Promise<void> = Promise.resolve()
+  let batch: BookItem[] = []
+  let batchSize = FIRST_BATCH
+  let total = 0
+
+  // Batches grow geometrically: the first rows arrive quickly, and the UI
+  // re-renders only O(log n) times for large files.
+  const flush = () => {
+    if (batch.length === 0) return
+    const rows = batch
+    batch = []
+    total += rows.length
+    batchSize = Math.min(batchSize * 2, MAX_BATCH)
+    post({ type: "batch", rows, source: "network" })
+    if (cache) pendingWrite = pendingWrite.then(() => cache.append(rows))
+  }
+
+  const push = (raw: string) => {
+    const item = parseLine(raw)
+    if (!item) return
+    batch.push(item)
+    if (batch.length >= batchSize) flush()
+  }
+
+  if (res.body) {
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader()
+    let buf = ""
+    for (;;) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buf += value
+      let start = 0
+      let nl: number
+      while ((nl = buf.indexOf("\n", start)) !== -1) {
+        push(buf.slice(start, nl))
+        start = nl + 1
+      }
+      buf = buf.slice(start)
+    }
+    push(buf)
+  } else {
+    for (const raw of (await res.text()).split("\n")) push(raw)
+  }
+  flush()
+
+  if (cache) {
+    try {
+      await pendingWrite
+      await cache.finish()
+    } catch {
+      cache.close() // ignore storage errors (quota, etc.)
+    }
+  }
+  return total
+}
+
+async function load(force: boolean): Promise<void> {
+  if (!force) {
+    let total = 0
+    const hit = await readCachedItems((rows) => {
+      total += rows.length
+      post({ type: "batch", rows, source: "cache" })
+    }).catch(() => false)
+    if (!hit && total > 0) post({ type: "reset" })
+    if (hit) {
+      post({ type: "done", total, source: "cache" })
+      return
+    }
+  }
+
+  const total = await loadFromNetwork(force)
+  post({ type: "done", total, source: "network" })
+}
+
+self.onmessage = (e: MessageEvent<WorkerRequest>) => {
+  if (e.data.type !== "load") return
+  load(e.data.force).catch((err) => post({ type: "error", message: String(err) }))
+}
@@ -1,3 +1,5 @@
+import { clearCachedItems } from "./idbCache"
+
 export type BookItem = {
   key: string
   site: "books"
@@ -11,53 +13,100 @@ export type BookItem = {
   description?: string
 }
 
-const CACHE_KEY = "books_items_jsonl_cache_v1"
+export type WorkerRequest = { type: "load"; force: boolean }
 
-function parseJsonl(text: string): BookItem[] {
-  const out: BookItem[] = []
-  for (const raw of text.split("\n")) {
-    const line = raw.trim()
-    if (!line) continue
-    try {
-      out.push(JSON.parse(line) as BookItem)
-    } catch {
-      // ignore malformed lines
-    }
-  }
-  return out
-}
+export type WorkerMessage =
+  | { type: "batch"; rows: BookItem[]; source: "cache" | "network" }
+  | { type: "reset" }
+  | { type: "done"; total: number; source: "cache" | "network" }
+  | { type: "error"; message: string }
 
-export async function loadItems(opts?: { forceRefresh?: boolean }): Promise<BookItem[]> {
-  const force = !!opts?.forceRefresh
-  if (!force) {
-    const cached = typeof window !== "undefined" ? localStorage.getItem(CACHE_KEY) : null
-    if (cached) {
-      try {
-        const { data } = JSON.parse(cached) as { data: BookItem[]; ts: number }
-        return data.slice().sort((a, b) => a.title.localeCompare(b.title))
-      } catch {
-        // ignore parse errors
-      }
-    }
-  }
+// Minimum gap between onBatch calls. Each call re-filters and re-sorts all
+// rows in the UI, so batches arriving faster than this are coalesced.
+const BATCH_UPDATE_MS = 250
 
-  const res = await fetch("/items.jsonl", { cache: force ? "reload" : "default" })
-  if (!res.ok) throw new Error(`Failed to load items.jsonl: ${res.status}`)
-  const text = await res.text()
-  const items = parseJsonl(text).sort((a, b) => a.title.localeCompare(b.title))
+// Pre-IndexedDB cache; removed on load to free the localStorage quota.
+const LEGACY_CACHE_KEY = "books_items_jsonl_cache_v1"
 
+function dropLegacyCache(): void {
   try {
-    localStorage.setItem(CACHE_KEY, JSON.stringify({ ts: Date.now(), data: items }))
+    localStorage.removeItem(LEGACY_CACHE_KEY)
   } catch {
-    // ignore storage errors (quota, etc.)
+    // ignore
   }
+}
+
+/**
+ * Loads items in a Web Worker that streams and parses `/items.jsonl`
+ * (or replays the IndexedDB cache). `onBatch` receives the accumulated
+ * rows at most once per animation frame and `BATCH_UPDATE_MS`; the promise
+ * resolves with all rows.
+ */
+export function loadItems(opts?: {
+  forceRefresh?: boolean
+  onBatch?: (rows: BookItem[]) => void
+  signal?: AbortSignal
+}): Promise<BookItem[]> {
+  dropLegacyCache()
+
+  return new Promise((resolve, reject) => {
+    const worker = new Worker(new URL("./itemsWorker.ts", import.meta.url), { type: "module" })
+    let rows: BookItem[] = []
+    let frame = 0
+    let lastUpdate = 0
+
+    const scheduleUpdate = () => {
+      if (frame || !opts?.onBatch) return
+      frame = requestAnimationFrame((now) => {
+        frame = 0
+        if (now - lastUpdate < BATCH_UPDATE_MS) return scheduleUpdate()
+        lastUpdate = now
+        opts?.onBatch?.(rows.slice())
+      })
+    }
+
+    const onAbort = () => {
+      cancelAnimationFrame(frame)
+      worker.terminate()
+      reject(new DOMException("Aborted", "AbortError"))
+    }
+    if (opts?.signal?.aborted) return onAbort()
+    opts?.signal?.addEventListener("abort", onAbort, { once: true })
+
+    const finish = () => {
+      cancelAnimationFrame(frame)
+      worker.terminate()
+      opts?.signal?.removeEventListener("abort", onAbort)
+    }
+
+    worker.onmessage = (e: MessageEvent<WorkerMessage>) => {
+      const msg = e.data
+      if (msg.type === "batch") {
+        for (const row of msg.rows) rows.push(row)
+        scheduleUpdate()
+      } else if (msg.type === "reset") {
+        rows = []
+      } else if (msg.type === "done") {
+        finish()
+        resolve(rows)
+      } else {
+        finish()
+        reject(new Error(msg.message))
+      }
+    }
+    worker.onerror = (e) => {
+      finish()
+      reject(new Error(e.message || "Items worker failed"))
+    }
 
-  return items
+    worker.postMessage({ type: "load", force: !!opts?.forceRefresh } satisfies WorkerRequest)
+  })
 }
 
-export function clearItemsCache(): void {
+export async function clearItemsCache(): Promise<void> {
+  dropLegacyCache()
   try {
-    localStorage.removeItem(CACHE_KEY)
+    await clearCachedItems()
   } catch {
     // ignore
   }